@@ -0,0 +1,619 @@
+"""Local embedded store for cleaned inquiry datasets.
+
+A cleaned dataset can be saved once into a SQLite database file and then
+opened by every session without uploading and parsing the workbook again.
+Queries are pushed down to SQL and only aggregated results come back:
+
+- the multiselect filters become ``WHERE ... IN (...)`` clauses,
+- the count chart is a ``GROUP BY`` over the filter columns,
+- the boxplot and describe() statistics are computed from a
+  ``GROUP BY category, value`` count (see ``box_stats.summarize_weighted_groups``),
+  so the result size follows the number of distinct measurements, not rows,
+- the data table fetches one page with ``ORDER BY ... LIMIT/OFFSET``, and
+  exports read the same query in chunks from one cursor.
+
+Counts and statistics are answered from two aggregate tables kept next to the
+rows: the row count of every combination of dimension values (a count cube)
+and, per combination and measurement column, how often each value occurs.
+Both merge by adding counts, so rows appended later (``InquiryStore.append``)
+update them from the new rows alone, and the exact quartiles and moments of
+any filtered group are computed from the value counts without reading history.
+
+Category columns are stored as integer codes with their categories kept in the
+catalog, so filters compare integers and sorting follows the vocabulary order,
+as in memory. SQLite ships with Python, so the store needs no extra dependency.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from box_stats import summarize_weighted_groups
+from grouped_stats import GroupedStats
+from schema import to_categorical
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "dehydrator4EN-JP", "inquiries.sqlite")
+INSERT_CHUNK_ROWS = 50_000
+# Missing dimension values in the aggregate tables; NULLs would never match in the upserts
+MISSING_CODE = -1
+
+
+def quote(name: str) -> str:
+    """Quote an identifier (column names contain spaces, % and /)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def column_spec(series: pd.Series) -> Dict:
+    """Describe how a column is stored: its kind, pandas dtype and (for categoricals) categories."""
+    spec = {"name": series.name, "dtype": str(series.dtype)}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        spec["kind"] = "category"
+        spec["categories"] = series.cat.categories.tolist()
+    elif pd.api.types.is_bool_dtype(series.dtype):
+        spec["kind"] = "boolean"
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        spec["kind"] = "number"
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        # Stored as integer ticks of the column's unit (UTC for time zone aware columns), so they sort as time
+        spec["kind"] = "datetime"
+        spec["unit"] = series.dt.unit
+    else:
+        spec["kind"] = "text"
+    return spec
+
+
+def encode_column(series: pd.Series, spec: Dict) -> List:
+    """Return the values of a column as Python objects for SQLite (None for missing)."""
+    kind = spec["kind"]
+    if kind == "category":
+        codes = series.cat.codes.to_numpy()
+        values = codes.astype(object)
+        values[codes < 0] = None
+    elif kind == "boolean":
+        values = np.array(series.astype(object), dtype=object)
+        values[series.isna().to_numpy()] = None
+    elif kind == "number":
+        numbers = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = numbers.astype(object)
+        values[np.isnan(numbers)] = None
+    elif kind == "datetime":
+        values = series.array.asi8.astype(object)
+        values[series.isna().to_numpy()] = None
+    else:
+        values = np.array(series.astype(str), dtype=object)
+        values[series.isna().to_numpy()] = None
+    return values.tolist()
+
+
+def conform_column(series: pd.Series, spec: Dict) -> Tuple[pd.Series, Dict]:
+    """Convert a column of rows being appended to the stored kind.
+       Categories not seen before are added after the stored ones, so existing codes stay valid."""
+    if spec["kind"] == "category":
+        values = series.astype(object).where(series.notna(), None)
+        present = set(values.dropna())
+        incoming = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else pd.unique(values.dropna())
+        known = set(spec["categories"])
+        categories = spec["categories"] + [v for v in incoming if v in present and v not in known]
+        categorical = pd.Categorical(values, categories=categories)
+        return pd.Series(categorical, index=series.index, name=spec["name"]), dict(spec, categories=categories)
+    if spec["kind"] == "number":
+        return pd.to_numeric(series, errors="coerce").rename(spec["name"]), spec
+    if spec["kind"] == "datetime":
+        dtype = pd.api.types.pandas_dtype(spec["dtype"])
+        stamps = pd.to_datetime(series, errors="coerce", format="mixed", utc=isinstance(dtype, pd.DatetimeTZDtype))
+        if not isinstance(dtype, pd.DatetimeTZDtype) and isinstance(stamps.dtype, pd.DatetimeTZDtype):
+            stamps = stamps.dt.tz_convert(None)
+        return stamps.astype(dtype).rename(spec["name"]), spec
+    return series.rename(spec["name"]), spec
+
+
+def decode_column(values: Iterable, spec: Dict) -> pd.Series:
+    """Rebuild a pandas column from stored values."""
+    kind = spec["kind"]
+    if kind == "category":
+        codes = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+        return pd.Series(pd.Categorical.from_codes(codes, categories=spec["categories"]), name=spec["name"])
+    if kind == "boolean":
+        return pd.Series(pd.array([None if v is None else bool(v) for v in values], dtype="boolean"), name=spec["name"])
+    if kind == "number":
+        numbers = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        try:
+            return pd.Series(numbers.astype(spec["dtype"]), name=spec["name"])
+        except (TypeError, ValueError):
+            # e.g. an integer column with missing values
+            return pd.Series(numbers, name=spec["name"])
+    if kind == "datetime":
+        dtype = pd.api.types.pandas_dtype(spec["dtype"])
+        ticks = np.array([np.iinfo(np.int64).min if v is None else v for v in values], dtype=np.int64)
+        # The smallest int64 is NaT
+        stamps = pd.Series(ticks.view(f"datetime64[{spec['unit']}]"), name=spec["name"])
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            stamps = stamps.dt.tz_localize("UTC").dt.tz_convert(dtype.tz)
+        return stamps
+    return pd.Series(list(values), dtype=object, name=spec["name"])
+
+
+def table_columns_sql(specs: List[Dict]) -> str:
+    return ", ".join(
+        f"{quote(spec['name'])} {'REAL' if spec['kind'] == 'number' else 'TEXT' if spec['kind'] == 'text' else 'INTEGER'}"
+        for spec in specs
+    )
+
+
+def dimension_names(specs: List[Dict]) -> List[str]:
+    return [spec["name"] for spec in specs if spec["kind"] in ("category", "boolean")]
+
+
+def measure_names(specs: List[Dict]) -> List[str]:
+    return [spec["name"] for spec in specs if spec.get("measure")]
+
+
+def create_aggregates(conn: sqlite3.Connection, table: str, specs: List[Dict]) -> None:
+    """Create the (empty) count cube ``<table>_cells`` and value counts ``<table>_hist`` of a dataset."""
+    dims = [quote(name) for name in dimension_names(specs)]
+    dim_sql = "".join(f"{dim} INTEGER NOT NULL, " for dim in dims)
+    conn.execute(f"CREATE TABLE {table}_cells ({dim_sql}__n INTEGER NOT NULL, PRIMARY KEY ({', '.join(dims)}))")
+    conn.execute(
+        f"CREATE TABLE {table}_hist (__measure TEXT NOT NULL, {dim_sql}__value REAL NOT NULL, __n INTEGER NOT NULL, "
+        f"PRIMARY KEY (__measure, {''.join(dim + ', ' for dim in dims)}__value))"
+    )
+
+
+def accumulate(conn: sqlite3.Connection, table: str, source: str, specs: List[Dict]) -> None:
+    """Add the counts of the rows of ``source`` to the aggregate tables of ``table``."""
+    dims = [quote(name) for name in dimension_names(specs)]
+    cells = ", ".join(f"COALESCE({dim}, {MISSING_CODE})" for dim in dims)
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint
+    conn.execute(
+        f"INSERT INTO {table}_cells SELECT {cells}, COUNT(*) FROM {source} WHERE true GROUP BY {cells} "
+        f"ON CONFLICT ({', '.join(dims)}) DO UPDATE SET __n = __n + excluded.__n"
+    )
+    for measure in measure_names(specs):
+        x = quote(measure)
+        conn.execute(
+            f"INSERT INTO {table}_hist SELECT ?, {cells}, {x}, COUNT(*) FROM {source} WHERE {x} IS NOT NULL "
+            f"GROUP BY {cells}, {x} "
+            f"ON CONFLICT (__measure, {''.join(dim + ', ' for dim in dims)}__value) DO UPDATE SET __n = __n + excluded.__n",
+            (measure,)
+        )
+
+
+class InquiryStore:
+    """A SQLite file holding any number of cleaned datasets, keyed by their dataset key."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._datasets: Dict[str, "StoredDataset"] = {}
+        # Guards the two dicts only; writes to a dataset are serialized by its own lock, never by this one,
+        # so sessions on other datasets (and readers of the one being written, thanks to WAL) are not held up
+        self._lock = threading.Lock()
+        self._dataset_locks: Dict[str, threading.RLock] = {}
+        # Result of list_datasets, read again only after this store saved, appended or deleted
+        self._catalog: Optional[List[Dict]] = None
+        with self.connect() as conn:
+            # WAL lets sessions read while another one saves a dataset
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS datasets ("
+                "dataset_key TEXT PRIMARY KEY, name TEXT, table_name TEXT, n_rows INTEGER, "
+                "columns TEXT, created_at TEXT)"
+            )
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one operation; it is committed (or rolled back) and closed afterwards."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _dataset_lock(self, dataset_key: str) -> threading.RLock:
+        with self._lock:
+            return self._dataset_locks.setdefault(dataset_key, threading.RLock())
+
+    def _forget(self, dataset_key: str) -> None:
+        """Drop the query interface memoized for ``dataset_key`` (and its memoized results)."""
+        with self._lock:
+            self._datasets.pop(dataset_key, None)
+            self._catalog = None
+
+    def list_datasets(self) -> List[Dict]:
+        """Return the stored datasets, newest first (memoized until this store changes them)."""
+        with self._lock:
+            catalog = self._catalog
+        if catalog is None:
+            with self.connect() as conn:
+                rows = conn.execute(
+                    "SELECT dataset_key, name, n_rows, created_at FROM datasets ORDER BY created_at DESC"
+                ).fetchall()
+            catalog = [dict(zip(["dataset_key", "name", "n_rows", "created_at"], row)) for row in rows]
+            with self._lock:
+                self._catalog = catalog
+        return [dict(info) for info in catalog]
+
+    @staticmethod
+    def _insert_rows(conn: sqlite3.Connection, table: str, df: pd.DataFrame, specs: List[Dict]) -> None:
+        insert_sql = f"INSERT INTO {table} VALUES ({', '.join('?' for _ in specs)})"
+        for start in range(0, len(df), INSERT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + INSERT_CHUNK_ROWS]
+            columns = [encode_column(chunk[spec["name"]], spec) for spec in specs]
+            conn.executemany(insert_sql, zip(*columns))
+
+    def save(
+        self,
+        df: pd.DataFrame,
+        dataset_key: str,
+        name: str,
+        measures: Optional[List[str]] = None,
+        dimensions: Optional[List[str]] = None,
+    ) -> "StoredDataset":
+        """Store ``df`` under ``dataset_key``, replacing an earlier copy; rows are inserted in chunks.
+           Value counts are kept for the ``measures`` columns (all numeric columns by default).
+           Text columns listed in ``dimensions`` (the filter columns) are stored as categories, so
+           filters and counts apply to them as they do in memory."""
+        table = "ds_" + "".join(c for c in dataset_key if c.isalnum())[:32]
+        df = df.copy(deep=False)
+        for col in dimensions or []:
+            if col in df.columns and column_spec(df[col])["kind"] == "text":
+                # e.g. an order status that could not be read as True/False
+                df[col] = to_categorical(df[col], [])
+        specs = [column_spec(df[col]) for col in df.columns]
+        for spec in specs:
+            if spec["kind"] == "number" and (measures is None or spec["name"] in measures):
+                spec["measure"] = True
+        with self._dataset_lock(dataset_key):
+            with self.connect() as conn:
+                for suffix in ("", "_cells", "_hist"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}{suffix}")
+                conn.execute(f"CREATE TABLE {table} ({table_columns_sql(specs)})")
+                self._insert_rows(conn, table, df, specs)
+                for i, spec in enumerate(specs):
+                    if spec["kind"] in ("category", "boolean"):
+                        conn.execute(f"CREATE INDEX {table}_idx{i} ON {table} ({quote(spec['name'])})")
+                if dimension_names(specs):
+                    create_aggregates(conn, table, specs)
+                    accumulate(conn, table, table, specs)
+                conn.execute(
+                    "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?)",
+                    (dataset_key, name, table, len(df), json.dumps(specs, ensure_ascii=False, default=str),
+                     datetime.datetime.now(datetime.timezone.utc).isoformat())
+                )
+            # Drop any query results memoized for an earlier copy (after the commit, so they are not rebuilt from it)
+            self._forget(dataset_key)
+            return self.open(dataset_key)
+
+    def open(self, dataset_key: str) -> Optional["StoredDataset"]:
+        """Return the query interface of a stored dataset (shared by all sessions), or None."""
+        with self._lock:
+            dataset = self._datasets.get(dataset_key)
+        if dataset is not None:
+            return dataset
+        with self._dataset_lock(dataset_key):
+            # Another session may have opened it while this one waited
+            with self._lock:
+                dataset = self._datasets.get(dataset_key)
+            if dataset is not None:
+                return dataset
+            with self.connect() as conn:
+                row = conn.execute(
+                    "SELECT name, table_name, n_rows, columns FROM datasets WHERE dataset_key = ?", (dataset_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                name, table, n_rows, columns = row
+                specs = json.loads(columns)
+                has_aggregates = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{table}_cells",)
+                ).fetchone() is not None
+                if not has_aggregates and dimension_names(specs):
+                    # Saved before the aggregate tables existed: build them once from the rows
+                    for spec in specs:
+                        if spec["kind"] == "number":
+                            spec["measure"] = True
+                    create_aggregates(conn, table, specs)
+                    accumulate(conn, table, table, specs)
+                    conn.execute(
+                        "UPDATE datasets SET columns = ? WHERE dataset_key = ?",
+                        (json.dumps(specs, ensure_ascii=False, default=str), dataset_key)
+                    )
+            dataset = StoredDataset(self, dataset_key, name, table, n_rows, specs)
+            with self._lock:
+                self._datasets[dataset_key] = dataset
+            return dataset
+
+    def append(self, dataset_key: str, delta: pd.DataFrame, key_columns: Optional[List[str]] = None) -> Tuple[int, int]:
+        """Add the rows of ``delta`` that are not stored yet and return (rows added, duplicates skipped).
+
+        Rows are compared on ``key_columns`` (all stored columns by default; missing values
+        match each other). Columns of ``delta`` that are not stored are ignored and stored
+        columns it lacks are left empty. The aggregate tables are updated from the new rows
+        only; history is read through an index on the key columns, never rescanned.
+        """
+        with self._dataset_lock(dataset_key):
+            # Appends to one dataset run one at a time, each on the specs left by the previous one
+            dataset = self.open(dataset_key)
+            if dataset is None:
+                raise KeyError(dataset_key)
+            added = self._append_rows(dataset, delta, key_columns)
+            self._forget(dataset_key)
+        return added, len(delta) - added
+
+    def _append_rows(self, dataset: "StoredDataset", delta: pd.DataFrame, key_columns: Optional[List[str]]) -> int:
+        table = dataset.table
+        delta = delta.reset_index(drop=True)
+        columns, specs = {}, []
+        for spec in dataset.specs.values():
+            series = delta[spec["name"]] if spec["name"] in delta.columns else pd.Series(
+                [None] * len(delta), index=delta.index, dtype=object
+            )
+            columns[spec["name"]], spec = conform_column(series, spec)
+            specs.append(spec)
+        frame = pd.DataFrame(columns)
+        key_columns = [col for col in (key_columns or []) if col in columns] or list(columns)
+        frame = frame.drop_duplicates(subset=key_columns)
+        keys = ", ".join(quote(col) for col in key_columns)
+        key_index = f"{table}_key_" + hashlib.sha256(keys.encode("utf-8")).hexdigest()[:12]
+        matches = " AND ".join(f"s.{quote(col)} IS append_rows.{quote(col)}" for col in key_columns)
+        with self.connect() as conn:
+            conn.execute(f"CREATE TEMP TABLE append_rows ({table_columns_sql(specs)})")
+            self._insert_rows(conn, "temp.append_rows", frame, specs)
+            # Built over the history on the first append with these key columns, then maintained by SQLite
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {key_index} ON {table} ({keys})")
+            conn.execute(f"DELETE FROM temp.append_rows WHERE EXISTS (SELECT 1 FROM {table} s WHERE {matches})")
+            added = int(conn.execute("SELECT COUNT(*) FROM temp.append_rows").fetchone()[0])
+            conn.execute(f"INSERT INTO {table} SELECT * FROM temp.append_rows")
+            if dimension_names(specs):
+                accumulate(conn, table, "temp.append_rows", specs)
+            conn.execute(
+                "UPDATE datasets SET n_rows = n_rows + ?, columns = ? WHERE dataset_key = ?",
+                (added, json.dumps(specs, ensure_ascii=False, default=str), dataset.dataset_key)
+            )
+            conn.execute("DROP TABLE temp.append_rows")
+        # The memoized query results describe the rows before the append; the caller drops them
+        return added
+
+    def delete(self, dataset_key: str) -> None:
+        with self._dataset_lock(dataset_key):
+            with self.connect() as conn:
+                row = conn.execute("SELECT table_name FROM datasets WHERE dataset_key = ?", (dataset_key,)).fetchone()
+                if row is not None:
+                    for suffix in ("", "_cells", "_hist"):
+                        conn.execute(f"DROP TABLE IF EXISTS {row[0]}{suffix}")
+                    conn.execute("DELETE FROM datasets WHERE dataset_key = ?", (dataset_key,))
+            self._forget(dataset_key)
+
+
+class StoredDataset:
+    """Pushed-down queries on one stored dataset.
+
+    Offers the interfaces the app uses on in-memory datasets: ``dimensions``,
+    ``total`` and ``counts_by`` like CountCube, ``get`` like GroupedStatsEngine,
+    and ``page`` and ``iter_rows`` for the data table and its export.
+    """
+
+    def __init__(self, store: InquiryStore, dataset_key: str, name: str, table: str, n_rows: int, specs: List[Dict]):
+        self.store = store
+        self.dataset_key = dataset_key
+        self.name = name
+        self.table = table
+        self.n_rows = n_rows
+        self.specs: Dict[str, Dict] = {spec["name"]: spec for spec in specs}
+        self.dimensions = dimension_names(specs)
+        self.measures = measure_names(specs)
+        # Without dimensions there are no aggregate tables and everything is counted on the rows
+        self.aggregated = bool(self.dimensions)
+        self._codes = {
+            col: {value: code for code, value in enumerate(spec["categories"])}
+            for col, spec in self.specs.items() if spec["kind"] == "category"
+        }
+        self._stats: "OrderedDict[Hashable, GroupedStats]" = OrderedDict()
+        self._max_stats = 64
+        self._lock = threading.Lock()
+
+    def schema_frame(self) -> pd.DataFrame:
+        """Return an empty frame with the dataset's columns and dtypes."""
+        df = pd.DataFrame({col: decode_column([], spec) for col, spec in self.specs.items()})
+        df.attrs["dataset_key"] = self.dataset_key
+        return df
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self.store.connect() as conn:
+            return conn.execute(sql, list(params)).fetchall()
+
+    def _where(self, selections: Optional[Dict[str, Iterable]]) -> Tuple[str, List]:
+        """Translate selections into a WHERE clause (same semantics as FilterIndex)."""
+        clauses, params = [], []
+        for col, values in (selections or {}).items():
+            if not values or col not in self.dimensions:
+                continue
+            if col in self._codes:
+                encoded = [self._codes[col][v] for v in values if v in self._codes[col]]
+            else:
+                encoded = [int(bool(v)) for v in values]
+            clauses.append(f"{quote(col)} IN ({', '.join('?' for _ in encoded)})")
+            params.extend(encoded)
+        return (" AND ".join(clauses) or "1"), params
+
+    def _decode_labels(self, column: str, values: List) -> pd.Series:
+        return decode_column(values, self.specs[column])
+
+    def values(self, column: str) -> List[Hashable]:
+        """Return the distinct non-missing values of a column."""
+        spec = self.specs.get(column)
+        if spec is None:
+            return []
+        if spec["kind"] == "category":
+            # The catalog only holds categories present when the dataset was saved
+            return list(spec["categories"])
+        rows = self._query(f"SELECT DISTINCT {quote(column)} FROM {self.table} WHERE {quote(column)} IS NOT NULL")
+        return self._decode_labels(column, [row[0] for row in rows]).tolist()
+
+    def total(self, selections: Optional[Dict[str, Iterable]] = None) -> int:
+        where, params = self._where(selections)
+        if self.aggregated:
+            return int(self._query(f"SELECT COALESCE(SUM(__n), 0) FROM {self.table}_cells WHERE {where}", params)[0][0])
+        return int(self._query(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params)[0][0])
+
+    def counts_by(self, group_by: List[str], selections: Optional[Dict[str, Iterable]] = None) -> pd.DataFrame:
+        """Return the ``group_by`` columns and a 'Count' column, like CountCube.counts_by."""
+        where, params = self._where(selections)
+        groups = ", ".join(quote(col) for col in group_by)
+        not_null = " AND ".join(f"{quote(col)} != {MISSING_CODE}" for col in group_by)
+        rows = self._query(
+            f"SELECT {groups}, SUM(__n) FROM {self.table}_cells WHERE {where} AND {not_null} GROUP BY {groups} ORDER BY {groups}",
+            params
+        )
+        result = {col: self._decode_labels(col, [row[i] for row in rows]) for i, col in enumerate(group_by)}
+        result["Count"] = np.array([row[-1] for row in rows], dtype=np.int64)
+        return pd.DataFrame(result)
+
+    def get(
+        self,
+        filter_key: Hashable,
+        positions: Optional[np.ndarray],
+        group_col: str,
+        value_col: str,
+        drop_zeros: bool = False,
+    ) -> GroupedStats:
+        """Return the statistics of ``value_col`` by ``group_col``, like GroupedStatsEngine.get.
+
+        The rows are selected by ``filter_key`` (a filter signature, or anything else to
+        select nothing); ``positions`` is accepted for compatibility and ignored.
+        """
+        key = (filter_key, value_col, drop_zeros, group_col)
+        with self._lock:
+            cached = self._stats.get(key)
+            if cached is not None:
+                self._stats.move_to_end(key)
+                return cached
+        result = self._grouped_stats(self._selections(filter_key), group_col, value_col, drop_zeros)
+        with self._lock:
+            self._stats[key] = result
+            while len(self._stats) > self._max_stats:
+                self._stats.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _selections(filter_key: Hashable) -> Optional[Dict]:
+        """Turn a filter signature back into selections; None means "match nothing"."""
+        return dict(filter_key) if isinstance(filter_key, tuple) else None
+
+    def _grouped_stats(self, selections: Optional[Dict], group_col: str, value_col: str, drop_zeros: bool) -> GroupedStats:
+        if selections is None or group_col not in self.specs or value_col not in self.specs:
+            codes, values, weights = np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64)
+            labels = pd.Index([])
+        else:
+            where, params = self._where(selections)
+            g = quote(group_col)
+            if group_col in self.dimensions and value_col in self.measures:
+                # Summed from the value counts, which merge across appends
+                rows = self._query(
+                    f"SELECT {g}, __value, SUM(__n) FROM {self.table}_hist "
+                    f"WHERE __measure = ? AND {where} AND {g} != {MISSING_CODE}" + (" AND __value != 0" if drop_zeros else "") +
+                    f" GROUP BY {g}, __value",
+                    [value_col] + params
+                )
+            else:
+                x = quote(value_col)
+                # Measurements repeat a lot, so (group, value, count) triples are far fewer than the rows
+                rows = self._query(
+                    f"SELECT {g}, {x}, COUNT(*) FROM {self.table} "
+                    f"WHERE {where} AND {g} IS NOT NULL AND {x} IS NOT NULL" + (f" AND {x} != 0" if drop_zeros else "") +
+                    f" GROUP BY {g}, {x}",
+                    params
+                )
+            group_values = [row[0] for row in rows]
+            values = np.array([row[1] for row in rows], dtype=np.float64)
+            weights = np.array([row[2] for row in rows], dtype=np.int64)
+            if self.specs[group_col]["kind"] == "category":
+                codes = np.array(group_values, dtype=np.int64)
+                labels = pd.Index(self.specs[group_col]["categories"])
+            else:
+                codes, labels = pd.factorize(self._decode_labels(group_col, group_values), sort=True)
+                labels = pd.Index(labels)
+        stats, outliers = summarize_weighted_groups(codes, values, weights, labels, group_col)
+        return GroupedStats(stats, outliers.rename(columns={"value": value_col}))
+
+    def _rows_sql(self, selections: Dict, sort_col: Optional[str], ascending: bool, columns: List[str]) -> Tuple[str, List]:
+        """SELECT of ``columns`` of the selected rows, sorted on ``sort_col`` (missing values last)."""
+        where, params = self._where(selections)
+        order = "rowid"
+        if sort_col in self.specs:
+            order = f"{quote(sort_col)} IS NULL, {quote(sort_col)} {'ASC' if ascending else 'DESC'}, rowid"
+        return f"SELECT {', '.join(quote(col) for col in columns)} FROM {self.table} WHERE {where} ORDER BY {order}", params
+
+    def _decode_rows(self, rows: List[Tuple], columns: List[str]) -> pd.DataFrame:
+        return pd.DataFrame({col: decode_column([row[i] for row in rows], self.specs[col]) for i, col in enumerate(columns)})
+
+    def page(
+        self,
+        filter_key: Hashable,
+        sort_col: Optional[str],
+        ascending: bool,
+        page: int,
+        page_size: int,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Return one page of the selected rows, sorted on ``sort_col`` (missing values last)."""
+        columns = [col for col in (columns if columns is not None else list(self.specs)) if col in self.specs]
+        selections = self._selections(filter_key)
+        if selections is None or not columns:
+            return self.schema_frame()[columns]
+        sql, params = self._rows_sql(selections, sort_col, ascending, columns)
+        rows = self._query(f"{sql} LIMIT ? OFFSET ?", params + [page_size, (max(page, 1) - 1) * page_size])
+        return self._decode_rows(rows, columns)
+
+    def iter_rows(
+        self,
+        filter_key: Hashable,
+        sort_col: Optional[str],
+        ascending: bool,
+        columns: Optional[List[str]] = None,
+        chunk_rows: int = INSERT_CHUNK_ROWS,
+    ) -> Iterator[pd.DataFrame]:
+        """Yield all selected rows in the order of ``page``, ``chunk_rows`` at a time, from one cursor.
+           At least one, possibly empty, chunk is yielded."""
+        columns = [col for col in (columns if columns is not None else list(self.specs)) if col in self.specs]
+        selections = self._selections(filter_key)
+        if selections is None or not columns:
+            yield self.schema_frame()[columns]
+            return
+        sql, params = self._rows_sql(selections, sort_col, ascending, columns)
+        with self.store.connect() as conn:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchmany(chunk_rows)
+            yield self._decode_rows(rows, columns)
+            while len(rows) == chunk_rows:
+                rows = cursor.fetchmany(chunk_rows)
+                if rows:
+                    yield self._decode_rows(rows, columns)
+
+
+_default_store: Optional[InquiryStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store(path: str = DEFAULT_STORE_PATH) -> InquiryStore:
+    """Return the process-wide store shared by all Streamlit sessions."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None or _default_store.path != path:
+            _default_store = InquiryStore(path)
+        return _default_store
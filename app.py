@@ -1,8 +1,35 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import sqlite3
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from typing import List, Dict
 
+import language_dict
+from analytics_store import DEFAULT_STORE_PATH, get_default_store
+from box_stats import box_figure_from_stats, build_box_figure
+from count_cube import CountCube
+from dataset_registry import DEFAULT_MEMORY_BUDGET_BYTES, get_default_registry
+from excel_stream import is_xlsx, read_excel_streaming
+from export import EXPORT_FORMATS, export_bytes, export_file_name, export_table, frame_chunks
+from filter_index import FilterIndex, filter_signature, take_rows
+from grouped_stats import GroupedStats, GroupedStatsEngine
+from parallel_ingest import ingest_workbooks, plan_jobs
+from profiling import profiled, stage, start_run
+from quantile_sketch import QuantileSketches
+from ingest_cache import get_default_cache, make_cache_key
+from schema import canonicalize_columns, coerce_numeric_columns, memory_report, normalize_schema
+from startup import lazy_import, warm_up
+from table_view import PAGE_SIZES, TableView, page_count, to_arrow
+from translation import SUPPORTED_LANGUAGES, Translator
+
+# numpy, pandas and plotly are imported on first use, so a cold process draws the upload prompt without waiting for them
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
 # Define constants for the categories (English) - Keep these as a fallback or for reference if needed, but we'll prioritize reading from data.
 MAIN_CATEGORIES = [
     "Energy-related", "Cleaning Factory", "Sewage-related",
@@ -37,35 +64,243 @@ COLUMN_SLUDGE_CONCENTRATION = "Sludge Concentration TS%"
 COLUMN_VTS_TS = "VTS%/TS"
 COLUMN_CAKE_MOISTURE = "Dewatered Cake Moisture %"
 COLUMN_SOLID_RECOVERY = "Solid Recovery Rate %"
+# Added when several files or sheets are combined: which file (and sheet) each row came from
+COLUMN_SOURCE = "Source"
+
+MEASUREMENT_COLUMNS = [COLUMN_SLUDGE_CONCENTRATION, COLUMN_VTS_TS, COLUMN_CAKE_MOISTURE, COLUMN_SOLID_RECOVERY]
+FILTER_COLUMNS = [COLUMN_ORDER_STATUS, COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY, COLUMN_MACHINE_TYPE]
+# Dimensions offered for the count chart
+CHART_TYPE_OPTIONS = [COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY, COLUMN_ORDER_STATUS]
+
+# Measurements where 0 means "not measured"; zeros are hidden from the boxplots unless "Show Zeros" is checked
+ZERO_FILTER_COLUMNS = [COLUMN_SOLID_RECOVERY, COLUMN_CAKE_MOISTURE]
+
+# Known values for each category column, used to build the Categorical dtypes (English first, then Japanese)
+CATEGORY_VOCABULARIES = {
+    COLUMN_MAIN_CATEGORY: language_dict.MAIN_CATEGORIES["en"] + MAIN_CATEGORIES + language_dict.MAIN_CATEGORIES["ja"],
+    COLUMN_SUB_CATEGORY: language_dict.SUB_CATEGORIES["en"] + SUB_CATEGORIES + language_dict.SUB_CATEGORIES["ja"],
+    COLUMN_MACHINE_TYPE: language_dict.DEWATERING_MACHINE_TYPES["en"] + DEWATERING_MACHINE_TYPES + language_dict.DEWATERING_MACHINE_TYPES["ja"],
+}
+
+# English headers in language_dict.COLUMN_MAP that differ from the column names used here
+ENGLISH_HEADER_ALIASES = {
+    "Cake Moisture %": COLUMN_CAKE_MOISTURE,
+    "Solid Recovery %": COLUMN_SOLID_RECOVERY,
+}
+
+# Japanese (and alternative English) headers, mapped to the column names used here
+HEADER_ALIASES = dict(ENGLISH_HEADER_ALIASES)
+HEADER_ALIASES.update({
+    ja: ENGLISH_HEADER_ALIASES.get(en, en) for ja, en in language_dict.COLUMN_MAP["en"].items()
+})
+
+# Display labels of the columns per UI language (English labels are the column names themselves)
+COLUMN_LABELS = {
+    "en": {COLUMN_SOURCE: language_dict.LANGUAGES["en"]["source"]},
+    "ja": dict(
+        {HEADER_ALIASES[ja]: ja for ja in language_dict.COLUMN_MAP["ja"]},
+        **{COLUMN_SOURCE: language_dict.LANGUAGES["ja"]["source"]}
+    ),
+}
+
+# Category values are translated through the parallel ja/en lists; both English spellings map to the same Japanese value
+TRANSLATOR = Translator(
+    value_pairs={
+        COLUMN_MAIN_CATEGORY: list(zip(language_dict.MAIN_CATEGORIES["ja"], language_dict.MAIN_CATEGORIES["en"]))
+            + list(zip(language_dict.MAIN_CATEGORIES["ja"], MAIN_CATEGORIES)),
+        COLUMN_SUB_CATEGORY: list(zip(language_dict.SUB_CATEGORIES["ja"], language_dict.SUB_CATEGORIES["en"]))
+            + list(zip(language_dict.SUB_CATEGORIES["ja"], SUB_CATEGORIES)),
+        COLUMN_MACHINE_TYPE: list(zip(language_dict.DEWATERING_MACHINE_TYPES["ja"], language_dict.DEWATERING_MACHINE_TYPES["en"]))
+            + list(zip(language_dict.DEWATERING_MACHINE_TYPES["ja"], DEWATERING_MACHINE_TYPES)),
+    },
+    column_labels=COLUMN_LABELS,
+)
+
+# Cleaning configuration. It is part of the ingestion cache key, so changing it invalidates cached frames.
+CLEANING_CONFIG = {
+    "version": 4,
+    "column_aliases": HEADER_ALIASES,
+    "numeric_columns": [COLUMN_SOLID_RECOVERY, COLUMN_CAKE_MOISTURE, COLUMN_SLUDGE_CONCENTRATION, COLUMN_VTS_TS],
+    "category_vocabularies": CATEGORY_VOCABULARIES,
+    "boolean_columns": [COLUMN_ORDER_STATUS],
+    "float32_columns": MEASUREMENT_COLUMNS,
+}
+
+# Workbooks at least this large are read with the streaming reader, which keeps only the analysis columns
+STREAMING_THRESHOLD_BYTES = 50 * 1024 ** 2
+STREAMING_CHUNK_ROWS = 50_000
+
+# Settings shipped to the worker processes that parse each (file, sheet) pair
+PARALLEL_INGEST_CONFIG = {
+    "canonical_columns": FILTER_COLUMNS + MEASUREMENT_COLUMNS,
+    "column_aliases": CLEANING_CONFIG["column_aliases"],
+    "numeric_columns": CLEANING_CONFIG["numeric_columns"],
+    "streaming_threshold_bytes": STREAMING_THRESHOLD_BYTES,
+    "streaming_columns": FILTER_COLUMNS + MEASUREMENT_COLUMNS,
+    "chunk_size": STREAMING_CHUNK_ROWS,
+}
+
+# Profiling can be switched on for every session with DEHYDRATOR_PROFILE=1; each rerun's stage
+# timings are appended as JSON lines to DEHYDRATOR_PROFILE_LOG when it is set
+PROFILE_BY_DEFAULT = os.environ.get("DEHYDRATOR_PROFILE", "") not in ("", "0")
+PROFILE_LOG_PATH = os.environ.get("DEHYDRATOR_PROFILE_LOG") or None
+
+# SQLite file in which cleaned datasets can be saved and shared between sessions. Persisting is an
+# option: the store is used only when DEHYDRATOR_STORE is set or the file already exists
+STORE_PATH = os.environ.get("DEHYDRATOR_STORE") or DEFAULT_STORE_PATH
+STORE_ENABLED = bool(os.environ.get("DEHYDRATOR_STORE"))
+# Columns identifying an inquiry when new rows are appended to a stored dataset (empty: all columns)
+APPEND_KEY_COLUMNS: List[str] = []
+
+# Once the upload prompt is drawn, the heavy modules and figure templates are loaded in the background
+# (once per process) so the first chart does not wait for them; DEHYDRATOR_WARM_UP=0 switches this off
+WARM_UP = os.environ.get("DEHYDRATOR_WARM_UP", "1") not in ("", "0")
+
+# Memory budget of the datasets (and their indexes) shared by all sessions of this server process
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("DEHYDRATOR_MEMORY_BUDGET_MB", 0)) * 1024 ** 2) or DEFAULT_MEMORY_BUDGET_BYTES
+
+def read_upload_bytes(uploaded_file) -> bytes:
+    """Return the raw bytes of a Streamlit upload, a file path or a binary file object."""
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    if isinstance(uploaded_file, (str, bytes)) or hasattr(uploaded_file, "__fspath__"):
+        with open(uploaded_file, "rb") as f:
+            return f.read()
+    return uploaded_file.read()
+
+@profiled("clean")
+def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the cleaning steps described by CLEANING_CONFIG to a freshly parsed frame.
+       The memory footprint before and after normalization is recorded in df.attrs["memory_footprint"]."""
+    raw_df = df.copy(deep=False)
+    # Japanese or differently spelled headers are renamed to the English column names
+    df = canonicalize_columns(df, FILTER_COLUMNS + MEASUREMENT_COLUMNS, CLEANING_CONFIG["column_aliases"])
+    df = coerce_numeric_columns(df, CLEANING_CONFIG["numeric_columns"])
+    # Japanese and English workbooks can be combined: category values are stored in English, once per distinct value
+    for col in CLEANING_CONFIG["category_vocabularies"]:
+        if col in df.columns:
+            df[col] = TRANSLATOR.canonicalize_series(df[col], col)
+
+    # Compact representation: categoricals, nullable boolean and float32 measurements
+    normalized = normalize_schema(
+        df,
+        CLEANING_CONFIG["category_vocabularies"],
+        CLEANING_CONFIG["boolean_columns"],
+        CLEANING_CONFIG["float32_columns"]
+    )
+    normalized.attrs["memory_footprint"] = memory_report(raw_df, normalized)
+    return normalized
+
+@profiled("parse")
+def read_workbook(data: bytes, progress_text: str = "Reading workbook...") -> pd.DataFrame:
+    """Parse the workbook bytes.
+       Large .xlsx files are streamed in chunks (analysis columns only) with a progress bar; others use pd.read_excel."""
+    if len(data) < STREAMING_THRESHOLD_BYTES or not is_xlsx(data):
+        return pd.read_excel(io.BytesIO(data))
+
+    progress_bar = st.progress(0.0, text=progress_text)
+
+    def report_progress(rows_read: int, total_rows) -> None:
+        if total_rows:
+            progress_bar.progress(min(rows_read / total_rows, 1.0), text=f"{progress_text} {rows_read:,} / {total_rows:,} rows")
+        else:
+            progress_bar.progress(0.0, text=f"{progress_text} {rows_read:,} rows")
+
+    try:
+        return read_excel_streaming(
+            data,
+            columns=FILTER_COLUMNS + MEASUREMENT_COLUMNS,
+            numeric_columns=CLEANING_CONFIG["numeric_columns"],
+            chunk_size=STREAMING_CHUNK_ROWS,
+            progress_callback=report_progress,
+            column_aliases=CLEANING_CONFIG["column_aliases"]
+        )
+    finally:
+        progress_bar.empty()
+
+def load_dataset(uploaded_file) -> pd.DataFrame:
+    """Parse and clean an Excel file, raising on any error (used as is by the command line tools).
+       Identical uploads (same bytes, same cleaning config) are served from the ingestion cache."""
+    data = read_upload_bytes(uploaded_file)
+    # The streaming reader keeps fewer columns, so it gets its own cache entries
+    streaming = len(data) >= STREAMING_THRESHOLD_BYTES and is_xlsx(data)
+    cache_key = make_cache_key(data, dict(CLEANING_CONFIG, reader="streaming" if streaming else "full"))
+    # The cached frame is shared between reruns and sessions, so it must not be modified in place
+    def parse_and_clean() -> pd.DataFrame:
+        df = clean_data(read_workbook(data))
+        # Identifies the dataset for the per-dataset indexes built in main()
+        df.attrs["dataset_key"] = cache_key
+        return df
+
+    return get_default_registry(MEMORY_BUDGET_BYTES).get_or_load(
+        cache_key, lambda: get_default_cache().get_or_load(cache_key, parse_and_clean)
+    )
 
+@profiled("load")
 def load_and_process_data(uploaded_file) -> pd.DataFrame:
-    """Load and process the uploaded Excel file."""
+    """Load and process the uploaded Excel file; errors are shown in the page and None is returned."""
     try:
-        df = pd.read_excel(uploaded_file)
+        return load_dataset(uploaded_file)
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+        return None
 
-        # Data Cleaning: Convert non-numeric, empty strings, or whitespace to NaN for specific columns
-        columns_to_clean = [COLUMN_SOLID_RECOVERY, COLUMN_CAKE_MOISTURE, COLUMN_SLUDGE_CONCENTRATION, COLUMN_VTS_TS]
-        for col in columns_to_clean:
-            if col in df.columns:
-                # Convert all non-numeric values (including blank strings) to NaN
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                # Also replace any remaining whitespace-only strings with NaN
-                df[col] = df[col].replace(r'^s*$', pd.NA, regex=True)
+@profiled("load_files")
+def load_and_process_files(uploaded_files: List, all_sheets: bool = False) -> pd.DataFrame:
+    """Load several Excel files (and optionally all of their sheets) into one dataset with a Source column.
+       Each (file, sheet) pair is parsed in its own worker process. A single upload read from its
+       first sheet goes through load_and_process_data unchanged."""
+    if len(uploaded_files) == 1 and not all_sheets:
+        return load_and_process_data(uploaded_files[0])
+    try:
+        files = [(getattr(f, "name", str(f)), read_upload_bytes(f)) for f in uploaded_files]
+        # Key on the name and content of every file, in upload order
+        fingerprint = b"".join(
+            hashlib.sha256(name.encode("utf-8")).digest() + hashlib.sha256(data).digest() for name, data in files
+        )
+        cache_key = make_cache_key(
+            fingerprint,
+            dict(CLEANING_CONFIG, reader="parallel", all_sheets=all_sheets, ingest=PARALLEL_INGEST_CONFIG)
+        )
 
-        return df
+        def parse_and_clean() -> pd.DataFrame:
+            jobs = plan_jobs(files, all_sheets)
+            progress_bar = st.progress(0.0, text=f"Reading {len(jobs)} sheet(s)...")
+            try:
+                combined = ingest_workbooks(
+                    jobs,
+                    PARALLEL_INGEST_CONFIG,
+                    source_column=COLUMN_SOURCE,
+                    progress_callback=lambda done, total: progress_bar.progress(done / total, text=f"Read {done} of {total} sheet(s)")
+                )
+            finally:
+                progress_bar.empty()
+            df = clean_data(combined)
+            df.attrs["dataset_key"] = cache_key
+            return df
+
+        return get_default_registry(MEMORY_BUDGET_BYTES).get_or_load(
+            cache_key, lambda: get_default_cache().get_or_load(cache_key, parse_and_clean)
+        )
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         return None
 
+def get_dataset_artifact(df: pd.DataFrame, name: str, builder):
+    """Return a helper structure (index, cube, ...) for df, building it only once per dataset.
+       The structures are shared by every session working on the same dataset."""
+    return get_default_registry(MEMORY_BUDGET_BYTES).artifact(df, name, builder)
+
+@profiled("boxplot")
 def create_boxplot(df: pd.DataFrame, value_col: str, category_col: str, show_outliers: bool = True) -> None:
     """Create and display a boxplot for the specified value column, grouped by a specified category.
-       Optionally hide outliers."""
+       Optionally hide outliers. Quartiles are computed on the server and only outliers are sent as points."""
     if df is not None and not df.empty:
-        points_mode = 'all' if show_outliers else False
-        fig = px.box(
+        points_mode = 'outliers' if show_outliers else False
+        fig = build_box_figure(
             df,
-            x=category_col,
-            y=value_col,
+            category_col,
+            value_col,
             points=points_mode,
             title=f"Boxplot of {value_col} by {category_col}"
         )
@@ -75,285 +310,539 @@ def create_boxplot(df: pd.DataFrame, value_col: str, category_col: str, show_out
         )
         st.plotly_chart(fig, use_container_width=True)
 
-def create_summary_chart(df: pd.DataFrame, group_by: str) -> None:
-    """Create and display a bar chart for the specified grouping (count)."""
-    if df is not None and not df.empty:
-        # Group by the primary category and then by machine type for color splitting
-        if group_by in [COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY]:
-            df_to_chart = df
-            if COLUMN_MACHINE_TYPE in df_to_chart.columns:
-                 summary = df_to_chart.groupby([group_by, COLUMN_MACHINE_TYPE]).size().reset_index(name='Count')
-                 summary = summary.sort_values(by=[group_by, 'Count'], ascending=[True, False])
-                 color_col = COLUMN_MACHINE_TYPE
+def summarize_counts(df: pd.DataFrame, group_by: str, cube: CountCube = None, selections: Dict = None):
+    """Return the count summary for a chart and the column used for color splitting.
+       When a count cube is given, the counts are sliced out of it and df is not scanned."""
+    # Group by the primary category and then by machine type for color splitting
+    if group_by in [COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY]:
+        columns = df.columns if cube is None else cube.dimensions
+        if COLUMN_MACHINE_TYPE in columns:
+            if cube is not None:
+                summary = cube.counts_by([group_by, COLUMN_MACHINE_TYPE], selections)
             else:
-                 summary = df_to_chart.groupby([group_by]).size().reset_index(name='Count')
-                 color_col = None
+                summary = df.groupby([group_by, COLUMN_MACHINE_TYPE], observed=True).size().reset_index(name='Count')
+            summary = summary.sort_values(by=[group_by, 'Count'], ascending=[True, False])
+            color_col = COLUMN_MACHINE_TYPE
         else:
-            summary = df[group_by].value_counts().reset_index()
-            summary.columns = [group_by, 'Count']
+            if cube is not None:
+                summary = cube.counts_by([group_by], selections)
+            else:
+                summary = df.groupby([group_by], observed=True).size().reset_index(name='Count')
             color_col = None
-
-        if group_by in summary.columns:
-             total_counts = summary.groupby(group_by)['Count'].sum().reset_index()
-             sorted_categories = total_counts.sort_values('Count', ascending=False)[group_by].tolist()
+    else:
+        if cube is not None:
+            summary = cube.counts_by([group_by], selections).sort_values('Count', ascending=False)
         else:
-             sorted_categories = summary[group_by].tolist() if group_by in summary.columns else []
-
-        fig = px.bar(
-            summary,
-            x=group_by,
-            y='Count',
-            title=f'Count by {group_by}',
-            labels={group_by: '', 'Count': 'Count'},
-            color=color_col,
-            text='Count',
-            text_auto=True,
-            color_discrete_sequence=px.colors.qualitative.Pastel,
-            category_orders={group_by: sorted_categories}
-        )
-        fig.update_layout(
-            xaxis_tickangle=-45,
-            height=500
-        )
+            summary = df[group_by].value_counts().reset_index()
+            summary.columns = [group_by, 'Count']
+            summary = summary[summary['Count'] > 0]
+        color_col = None
+    return summary, color_col
+
+def build_summary_chart(df: pd.DataFrame, group_by: str, cube: CountCube = None, selections: Dict = None, lang: str = "en"):
+    """Build the count bar chart for the specified grouping, or return None when there is nothing to count.
+       If a count cube is given, df may be None and the counts for `selections` are read from the cube.
+       Category values and labels are shown in `lang`."""
+    if cube is None and (df is None or df.empty):
+        return None
+    summary, color_col = summarize_counts(df, group_by, cube, selections)
+    if summary.empty:
+        return None
+    # Translate the (few) category labels of the summary, not the rows
+    for col in [group_by, color_col]:
+        if col is not None:
+            summary[col] = TRANSLATOR.translate_series(summary[col], lang, col)
+    texts = language_dict.LANGUAGES[lang]
+
+    if group_by in summary.columns:
+         total_counts = summary.groupby(group_by, observed=True)['Count'].sum().reset_index()
+         sorted_categories = total_counts.sort_values('Count', ascending=False)[group_by].tolist()
+    else:
+         sorted_categories = summary[group_by].tolist() if group_by in summary.columns else []
+
+    labels = {group_by: '', 'Count': texts["count"]}
+    if color_col is not None:
+        labels[color_col] = TRANSLATOR.column(color_col, lang)
+    fig = px.bar(
+        summary,
+        x=group_by,
+        y='Count',
+        title=texts["count_by"].format(col=TRANSLATOR.column(group_by, lang)),
+        labels=labels,
+        color=color_col,
+        text='Count',
+        text_auto=True,
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+        category_orders={group_by: sorted_categories}
+    )
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        height=500
+    )
+    return fig
+
+@profiled("summary_chart")
+def create_summary_chart(df: pd.DataFrame, group_by: str, cube: CountCube = None, selections: Dict = None, lang: str = "en") -> None:
+    """Create and display a bar chart for the specified grouping (count); see build_summary_chart."""
+    fig = build_summary_chart(df, group_by, cube, selections, lang)
+    if fig is not None:
         st.plotly_chart(fig, use_container_width=True)
 
+def translate_grouped_stats(grouped: GroupedStats, group_col: str, lang: str) -> GroupedStats:
+    """Translate the category labels of grouped statistics (one label per group, not per row)."""
+    stats = grouped.stats.set_axis(TRANSLATOR.translate_index(grouped.stats.index, lang, group_col), axis=0)
+    stats.index.name = TRANSLATOR.column(group_col, lang)
+    outliers = grouped.outliers.copy()
+    outliers[group_col] = TRANSLATOR.translate_series(outliers[group_col], lang, group_col)
+    return GroupedStats(stats, outliers)
+
+def build_grouped_boxplot(grouped: GroupedStats, group_col: str, value_col: str, lang: str = "en", show_outliers: bool = False):
+    """Build the boxplot of a boxplot panel from (translated) grouped statistics, categories sorted by count."""
+    texts = language_dict.LANGUAGES[lang]
+    group_label = TRANSLATOR.column(group_col, lang)
+    value_label = TRANSLATOR.column(value_col, lang)
+    fig = box_figure_from_stats(
+        grouped.stats,
+        group_label,
+        value_label,
+        points=grouped.outliers if show_outliers else None,
+        title=texts["boxplot_title"].format(col=value_label, group=group_label),
+        category_order=grouped.category_order()
+    )
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        height=600
+    )
+    return fig
+
 def main():
-    st.set_page_config(page_title="📊 Inquiry Data Analysis APP", layout="wide")
-    st.title("📊 Dewatering Machine Inquiry Analysis APP")
-
-    # File upload
-    uploaded_file = st.file_uploader("Please upload an Excel file", type=['xlsx', 'xls'])
-
-    if uploaded_file is not None:
-        df = load_and_process_data(uploaded_file)
-
-        if df is not None:
-            # Get unique values from category columns for dynamic filtering
-            main_categories_from_data = sorted(df[COLUMN_MAIN_CATEGORY].dropna().unique().tolist()) if COLUMN_MAIN_CATEGORY in df.columns else []
-            sub_categories_from_data = sorted(df[COLUMN_SUB_CATEGORY].dropna().unique().tolist()) if COLUMN_SUB_CATEGORY in df.columns else []
-            machine_types_from_data = sorted(df[COLUMN_MACHINE_TYPE].dropna().unique().tolist()) if COLUMN_MACHINE_TYPE in df.columns else []
-
-            # Filter settings
-            st.header("Filter Settings")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                order_status = st.multiselect(
-                    "Order Status",
-                    options=[True, False],
-                    default=[True, False]
-                )
-            with col2:
-                selected_main_categories = st.multiselect(
-                    "Main Category",
-                    options=main_categories_from_data, # Use dynamic options
-                    default=[]
-                )
-            with col3:
-                selected_sub_categories = st.multiselect(
-                    "Sub Category",
-                    options=sub_categories_from_data, # Use dynamic options
-                    default=[]
-                )
-            with col4:
-                selected_machine_types = st.multiselect(
-                    "Dewatering Machine Type",
-                    options=machine_types_from_data, # Use dynamic options
-                    default=[]
-                )
+    st.set_page_config(page_title=language_dict.LANGUAGES["en"]["app_title"], layout="wide")
+    # Switching the language only relabels the output; the parsed data and its indexes are reused
+    lang = st.sidebar.radio(
+        "Language / 言語",
+        SUPPORTED_LANGUAGES,
+        format_func=lambda code: {"en": "English", "ja": "日本語"}[code],
+        key="lang"
+    )
+    texts = language_dict.LANGUAGES[lang]
+    # Widgets with translated labels get a fixed key; without one, switching the language would reset them
+    diagnostics = st.sidebar.checkbox(texts["diagnostics"], value=PROFILE_BY_DEFAULT, help=texts["diagnostics_help"], key="diagnostics")
+    track_memory = diagnostics and st.sidebar.checkbox(texts["track_memory"], value=False, key="track_memory")
+    profiler = start_run(diagnostics, track_memory=track_memory, log_path=PROFILE_LOG_PATH, context={"lang": lang})
+    try:
+        st.title(texts["app_title"])
+
+        # File upload
+        uploaded_files = st.file_uploader(texts["upload_label"], type=['xlsx', 'xls'], accept_multiple_files=True, key="upload_files")
+        read_all_sheets = st.checkbox(texts["read_all_sheets"], value=False, help=texts["read_all_sheets_help"], key="read_all_sheets")
+        if WARM_UP:
+            warm_up()
+
+        # Datasets saved by any session can be opened without uploading the workbook again
+        store, stored_datasets = None, {}
+        if STORE_ENABLED or os.path.exists(STORE_PATH):
+            try:
+                store = get_default_store(STORE_PATH)
+                # Memoized by the store, so widget clicks do not query SQLite
+                stored_datasets = {info["dataset_key"]: info for info in store.list_datasets()}
+            except (OSError, sqlite3.Error):
+                store, stored_datasets = None, {}
+        stored_key = None
+        if not uploaded_files and stored_datasets:
+            stored_key = st.sidebar.selectbox(
+                texts["stored_dataset"],
+                [None] + list(stored_datasets),
+                format_func=lambda key: texts["stored_none"] if key is None else texts["stored_label"].format(
+                    name=stored_datasets[key]["name"], rows=stored_datasets[key]["n_rows"]
+                ),
+                key="stored_dataset"
+            )
 
-            filtered_df = df.copy()
-            if order_status:
-                # Filter based on English column name
-                if COLUMN_ORDER_STATUS in filtered_df.columns:
-                    filtered_df = filtered_df[filtered_df[COLUMN_ORDER_STATUS].isin(order_status)]
-                else:
-                    st.warning(f"Column '{COLUMN_ORDER_STATUS}' not found in data.")
-                    # If column is missing, filter out everything to be safe
-                    filtered_df = filtered_df[filtered_df[COLUMN_ORDER_STATUS].isnull()]
-
-            if selected_main_categories:
-                # Filter based on English column name
-                if COLUMN_MAIN_CATEGORY in filtered_df.columns:
-                    filtered_df = filtered_df[filtered_df[COLUMN_MAIN_CATEGORY].isin(selected_main_categories)]
-                else:
-                    st.warning(f"Column '{COLUMN_MAIN_CATEGORY}' not found in data.")
-                    filtered_df = filtered_df[filtered_df[COLUMN_MAIN_CATEGORY].isnull()]
+        if uploaded_files or stored_key is not None:
+            # With a stored dataset, filters and aggregations run as SQL and df only carries the schema
+            store_view = None
+            if uploaded_files:
+                df = load_and_process_files(uploaded_files, all_sheets=read_all_sheets)
+            else:
+                store_view = store.open(stored_key)
+                df = store_view.schema_frame() if store_view is not None else None
+
+            if df is not None:
+                footprint = df.attrs.get("memory_footprint")
+                if footprint:
+                    st.caption(texts["memory_footprint"].format(
+                        before=footprint['before_bytes'] / 1024 ** 2,
+                        after=footprint['after_bytes'] / 1024 ** 2
+                    ))
+                if store is not None and store_view is None and st.sidebar.button(texts["save_to_store"], help=texts["save_to_store_help"], key="save_to_store"):
+                    dataset_name = ", ".join(getattr(f, "name", str(f)) for f in uploaded_files)
+                    with st.spinner(texts["saving_to_store"]):
+                        store.save(df, df.attrs.get("dataset_key", dataset_name), dataset_name, dimensions=FILTER_COLUMNS)
+                    st.sidebar.success(texts["saved_to_store"].format(name=dataset_name, rows=len(df)))
+                if store_view is not None:
+                    # A delta workbook is merged into the stored dataset; counts and statistics are updated from the new rows only
+                    with st.sidebar.expander(texts["append_header"]):
+                        delta_file = st.file_uploader(texts["append_upload"], type=['xlsx', 'xls'], key="append_file")
+                        stored_columns = list(store_view.specs)
+                        key_columns = st.multiselect(
+                            texts["append_key"],
+                            stored_columns,
+                            default=[col for col in APPEND_KEY_COLUMNS if col in stored_columns] or stored_columns,
+                            help=texts["append_key_help"],
+                            key="append_key_columns"
+                        )
+                        if delta_file is not None and st.button(texts["append_button"], key="append_button"):
+                            delta = load_and_process_data(delta_file)
+                            if delta is not None:
+                                with st.spinner(texts["appending"]):
+                                    added, duplicates = store.append(stored_key, delta, key_columns)
+                                st.success(texts["appended"].format(added=added, duplicates=duplicates))
+                                store_view = store.open(stored_key)
+                                df = store_view.schema_frame()
+
+                # Get unique values from category columns for dynamic filtering
+                main_categories_from_data = sorted(store_view.values(COLUMN_MAIN_CATEGORY) if store_view is not None else df[COLUMN_MAIN_CATEGORY].dropna().unique().tolist()) if COLUMN_MAIN_CATEGORY in df.columns else []
+                sub_categories_from_data = sorted(store_view.values(COLUMN_SUB_CATEGORY) if store_view is not None else df[COLUMN_SUB_CATEGORY].dropna().unique().tolist()) if COLUMN_SUB_CATEGORY in df.columns else []
+                machine_types_from_data = sorted(store_view.values(COLUMN_MACHINE_TYPE) if store_view is not None else df[COLUMN_MACHINE_TYPE].dropna().unique().tolist()) if COLUMN_MACHINE_TYPE in df.columns else []
+
+                # Filter settings
+                st.header(texts["filter_header"])
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    order_status = st.multiselect(
+                        texts["order_status"],
+                        options=[True, False],
+                        default=[True, False],
+                        key="filter_order_status"
+                    )
+                with col2:
+                    selected_main_categories = st.multiselect(
+                        texts["main_category"],
+                        options=main_categories_from_data, # Use dynamic options
+                        default=[],
+                        format_func=lambda value: TRANSLATOR.value(COLUMN_MAIN_CATEGORY, value, lang),
+                        key="filter_main_category"
+                    )
+                with col3:
+                    selected_sub_categories = st.multiselect(
+                        texts["sub_category"],
+                        options=sub_categories_from_data, # Use dynamic options
+                        default=[],
+                        format_func=lambda value: TRANSLATOR.value(COLUMN_SUB_CATEGORY, value, lang),
+                        key="filter_sub_category"
+                    )
+                with col4:
+                    selected_machine_types = st.multiselect(
+                        texts["machine_type"],
+                        options=machine_types_from_data, # Use dynamic options
+                        default=[],
+                        format_func=lambda value: TRANSLATOR.value(COLUMN_MACHINE_TYPE, value, lang),
+                        key="filter_machine_type"
+                    )
+
+                # Filters are evaluated against a bitmap index built once per dataset;
+                # only the final selection is materialized
+                filter_index = get_dataset_artifact(df, "filter_index", lambda: FilterIndex(df, FILTER_COLUMNS)) if store_view is None else None
+                selections = {}
+                match_nothing = False
+                if order_status:
+                    # Filter based on English column name
+                    if COLUMN_ORDER_STATUS in df.columns:
+                        selections[COLUMN_ORDER_STATUS] = order_status
+                    else:
+                        st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_ORDER_STATUS, lang)))
+                        # If column is missing, filter out everything to be safe
+                        match_nothing = True
+
+                if selected_main_categories:
+                    # Filter based on English column name
+                    if COLUMN_MAIN_CATEGORY in df.columns:
+                        selections[COLUMN_MAIN_CATEGORY] = selected_main_categories
+                    else:
+                        st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_MAIN_CATEGORY, lang)))
+                        match_nothing = True
 
-            if selected_sub_categories:
-                # Filter based on English column name
-                if COLUMN_SUB_CATEGORY in filtered_df.columns:
-                    filtered_df = filtered_df[filtered_df[COLUMN_SUB_CATEGORY].isin(selected_sub_categories)]
-                else:
-                    st.warning(f"Column '{COLUMN_SUB_CATEGORY}' not found in data.")
-                    filtered_df = filtered_df[filtered_df[COLUMN_SUB_CATEGORY].isnull()]
+                if selected_sub_categories:
+                    # Filter based on English column name
+                    if COLUMN_SUB_CATEGORY in df.columns:
+                        selections[COLUMN_SUB_CATEGORY] = selected_sub_categories
+                    else:
+                        st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_SUB_CATEGORY, lang)))
+                        match_nothing = True
 
-            if selected_machine_types:
-                # Filter based on English column name
-                if COLUMN_MACHINE_TYPE in filtered_df.columns:
-                    filtered_df = filtered_df[filtered_df[COLUMN_MACHINE_TYPE].isin(selected_machine_types)]
-                else:
-                    st.warning(f"Column '{COLUMN_MACHINE_TYPE}' not found in data. Filter will not be applied.")
-
-            # Analysis result (count)
-            st.header("Analysis Result")
-            st.write(f"Total Count After Filtering: {len(filtered_df)}")
-
-            st.subheader("Count Chart")
-            chart_type_options = [
-                COLUMN_MAIN_CATEGORY,
-                COLUMN_SUB_CATEGORY,
-                COLUMN_ORDER_STATUS
-            ]
-            chart_type = st.radio(
-                "Select Chart Type:",
-                chart_type_options
-            )
-            # Ensure the selected chart_type column exists in the dataframe before charting
-            if chart_type in filtered_df.columns: # Check against filtered_df as options might be limited after filtering
-                create_summary_chart(filtered_df, chart_type)
-            else:
-                st.warning(f"Column '{chart_type}' not found in data. Count chart will not be displayed.")
-
-            # Numeric analysis (boxplot & summary stats)
-            st.header("Numeric Analysis (Boxplot & Summary Stats)")
-            # Use the filtered dataframe to get numeric columns
-            numeric_columns = filtered_df.select_dtypes(include='number').columns.tolist()
-
-            # Define the preferred order of columns
-            preferred_columns = [COLUMN_SLUDGE_CONCENTRATION, COLUMN_VTS_TS, COLUMN_CAKE_MOISTURE, COLUMN_SOLID_RECOVERY]
-
-            # Create the ordered list for selectbox options
-            # Start with preferred columns that are present in numeric_columns
-            ordered_numeric_columns = [col for col in preferred_columns if col in numeric_columns]
-
-            # Add the remaining numeric columns that are not in the preferred list, maintaining their original relative order
-            ordered_numeric_columns.extend([col for col in numeric_columns if col not in preferred_columns])
-
-            if ordered_numeric_columns:
-                # Create 2 columns for boxplot and summary stats side by side
-                col_box1, col_box2 = st.columns(2)
-
-                with col_box1:
-                    # Boxplot 1: by Main Category
-                    st.subheader("Boxplot 1: Main Category")
-                    # Use the ordered list for options
-                    value_col_main = st.selectbox("Select Numeric Column", ordered_numeric_columns, key="boxplot1_value")
-                    show_outliers_main = st.checkbox("Show Outliers", value=False, key="outliers_main")
-                    show_zeros_main = st.checkbox("Show Zeros", value=False, key="show_zeros_main")
-
-                    # Ensure 'Main Category' column exists before creating the boxplot
-                    if COLUMN_MAIN_CATEGORY in filtered_df.columns:
-                        if value_col_main:
-                            # Filter out 0 and NaN values for specific columns if selected
-                            df_for_analysis_main = filtered_df.copy()
-                            columns_to_filter_zero_and_nan = [COLUMN_SOLID_RECOVERY, COLUMN_CAKE_MOISTURE]
-                            if value_col_main in columns_to_filter_zero_and_nan and not show_zeros_main:
-                                df_for_analysis_main = df_for_analysis_main[df_for_analysis_main[value_col_main].notna() & (df_for_analysis_main[value_col_main] != 0)]
-                            elif value_col_main in columns_to_filter_zero_and_nan and show_zeros_main:
-                                df_for_analysis_main = df_for_analysis_main[df_for_analysis_main[value_col_main].notna()] # Just filter NaNs if show_zeros is true
-
-                            # Sort categories by count for boxplot
-                            # Use the filtered dataframe for counts to reflect the current view
-                            category_counts_main = df_for_analysis_main[COLUMN_MAIN_CATEGORY].value_counts().reset_index()
-                            category_counts_main.columns = [COLUMN_MAIN_CATEGORY, 'count']
-                            sorted_categories_main = category_counts_main.sort_values('count', ascending=False)[COLUMN_MAIN_CATEGORY].tolist()
-
-                            # Create boxplot with sorted categories
-                            fig_main = px.box(
-                                df_for_analysis_main,
-                                x=COLUMN_MAIN_CATEGORY,
-                                y=value_col_main,
-                                points='all' if show_outliers_main else False,
-                                title=f"Boxplot of {value_col_main} by {COLUMN_MAIN_CATEGORY}",
-                                category_orders={COLUMN_MAIN_CATEGORY: sorted_categories_main}
-                            )
-                            fig_main.update_layout(
-                                xaxis_tickangle=-45,
-                                height=600
-                            )
-                            st.plotly_chart(fig_main, use_container_width=True, config={'scrollZoom': True})
-
-                            st.markdown("---") # Add a separator
-
-                            # Summary stats: by Main Category
-                            st.subheader(f"📊 Summary Stats of {value_col_main} (by {COLUMN_MAIN_CATEGORY})")
-                            try:
-                                # Ensure the column exists before grouping
-                                if COLUMN_MAIN_CATEGORY in df_for_analysis_main.columns:
-                                     grouped_stats_main = df_for_analysis_main.groupby(COLUMN_MAIN_CATEGORY)[value_col_main].describe()
-                                     st.dataframe(grouped_stats_main)
-                                else:
-                                     st.warning(f"Column '{COLUMN_MAIN_CATEGORY}' not found. Summary stats by {COLUMN_MAIN_CATEGORY} will not be displayed.")
-
-                            except Exception as e:
-                                st.error(f"An error occurred while calculating summary stats by {COLUMN_MAIN_CATEGORY}: {str(e)}")
+                if selected_machine_types:
+                    # Filter based on English column name
+                    if COLUMN_MACHINE_TYPE in df.columns:
+                        selections[COLUMN_MACHINE_TYPE] = selected_machine_types
                     else:
-                         st.warning(f"Column '{COLUMN_MAIN_CATEGORY}' not found. Boxplot 1 will not be displayed.")
-
-
-                with col_box2:
-                    # Boxplot 2: by Sub Category
-                    st.subheader("Boxplot 2: Sub Category")
-                    # Use the ordered list for options
-                    value_col_sub = st.selectbox("Select Numeric Column", ordered_numeric_columns, key="boxplot2_value")
-                    show_outliers_sub = st.checkbox("Show Outliers", value=False, key="outliers_sub")
-                    show_zeros_sub = st.checkbox("Show Zeros", value=False, key="show_zeros_sub")
-
-                    # Ensure 'Sub Category' column exists before creating the boxplot
-                    if COLUMN_SUB_CATEGORY in filtered_df.columns:
-                        if value_col_sub:
-                            # Filter out 0 and NaN values for specific columns if selected
-                            df_for_analysis_sub = filtered_df.copy()
-                            columns_to_filter_zero_and_nan = [COLUMN_SOLID_RECOVERY, COLUMN_CAKE_MOISTURE]
-                            if value_col_sub in columns_to_filter_zero_and_nan and not show_zeros_sub:
-                                df_for_analysis_sub = df_for_analysis_sub[df_for_analysis_sub[value_col_sub].notna() & (df_for_analysis_sub[value_col_sub] != 0)]
-                            elif value_col_sub in columns_to_filter_zero_and_nan and show_zeros_sub:
-                                df_for_analysis_sub = df_for_analysis_sub[df_for_analysis_sub[value_col_sub].notna()] # Just filter NaNs if show_zeros is true
-
-                            # Sort categories by count for boxplot
-                            # Use the filtered dataframe for counts to reflect the current view
-                            category_counts_sub = df_for_analysis_sub[COLUMN_SUB_CATEGORY].value_counts().reset_index()
-                            category_counts_sub.columns = [COLUMN_SUB_CATEGORY, 'count']
-                            sorted_categories_sub = category_counts_sub.sort_values('count', ascending=False)[COLUMN_SUB_CATEGORY].tolist()
-
-                            # Create boxplot with sorted categories
-                            fig_sub = px.box(
-                                df_for_analysis_sub,
-                                x=COLUMN_SUB_CATEGORY,
-                                y=value_col_sub,
-                                points='all' if show_outliers_sub else False,
-                                title=f"Boxplot of {value_col_sub} by {COLUMN_SUB_CATEGORY}",
-                                category_orders={COLUMN_SUB_CATEGORY: sorted_categories_sub}
-                            )
-                            fig_sub.update_layout(
-                                xaxis_tickangle=-45,
-                                height=600
-                            )
-                            st.plotly_chart(fig_sub, use_container_width=True, config={'scrollZoom': True})
-
-                            st.markdown("---") # Add a separator
-
-                            # Summary stats: by Sub Category
-                            st.subheader(f"📊 Summary Stats of {value_col_sub} (by {COLUMN_SUB_CATEGORY})")
-                            try:
-                                # Ensure the column exists before grouping
-                                if COLUMN_SUB_CATEGORY in df_for_analysis_sub.columns:
-                                     grouped_stats_sub = df_for_analysis_sub.groupby(COLUMN_SUB_CATEGORY)[value_col_sub].describe()
-                                     st.dataframe(grouped_stats_sub)
-                                else:
-                                     st.warning(f"Column '{COLUMN_SUB_CATEGORY}' not found. Summary stats by {COLUMN_SUB_CATEGORY} will not be displayed.")
-
-                            except Exception as e:
-                                st.error(f"An error occurred while calculating summary stats by {COLUMN_SUB_CATEGORY}: {str(e)}")
+                        # The machine type filter is simply not applied
+                        st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_MACHINE_TYPE, lang)))
+
+                with stage("filter", rows_in=len(df) if store_view is None else store_view.n_rows) as filter_stage:
+                    if match_nothing:
+                        filter_key = "match_nothing"
+                        row_positions = np.empty(0, dtype=np.intp)
                     else:
-                         st.warning(f"Column '{COLUMN_SUB_CATEGORY}' not found. Boxplot 2 will not be displayed.")
+                        filter_key = filter_signature(selections)
+                        # The store evaluates the filters inside its queries
+                        row_positions = filter_index.select(selections) if filter_index is not None else None
+                    # Only positions are kept; rows are copied just where a consumer needs them
+                    if store_view is None:
+                        filter_stage.rows_out = len(df) if row_positions is None else len(row_positions)
+
+                # Downloads are built only when their button is clicked, in chunks, from the shared columns
+                export_format = st.sidebar.selectbox(
+                    texts["export_format"],
+                    list(EXPORT_FORMATS),
+                    format_func=str.upper,
+                    help=texts["export_format_help"],
+                    key="export_format"
+                )
 
-            else:
-                st.warning("No numeric columns found for boxplot and summary stats.")
+                # Analysis result (count)
+                st.header(texts["analysis_header"])
+                # Counts come from the cube built at load time, not from the filtered rows
+                if match_nothing:
+                    count_cube = None
+                elif store_view is not None:
+                    # Counts are GROUP BY queries on the store
+                    count_cube = store_view
+                else:
+                    count_cube = get_dataset_artifact(df, "count_cube", lambda: CountCube(df, FILTER_COLUMNS))
+                total_count = count_cube.total(selections) if count_cube is not None else 0
+                st.write(f"{texts['total_count']}: {total_count}")
+
+                st.subheader(texts["chart_subheader"])
+                chart_type = st.radio(
+                    texts["chart_type_select"],
+                    CHART_TYPE_OPTIONS,
+                    format_func=lambda col: TRANSLATOR.column(col, lang),
+                    key="chart_type"
+                )
+                # Ensure the selected chart_type column exists in the dataframe before charting
+                if chart_type in df.columns:
+                    if count_cube is not None and chart_type in count_cube.dimensions:
+                        create_summary_chart(None, chart_type, cube=count_cube, selections=selections, lang=lang)
+                    else:
+                        create_summary_chart(take_rows(df, row_positions), chart_type, lang=lang)
+                else:
+                    st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(chart_type, lang)))
+
+                # Numeric analysis (boxplot & summary stats)
+                st.header(texts["boxplot_header"])
+                # Filtering keeps the dtypes, so the numeric columns can be read from the full dataframe
+                numeric_columns = df.select_dtypes(include='number').columns.tolist()
+
+                # Define the preferred order of columns
+                preferred_columns = [COLUMN_SLUDGE_CONCENTRATION, COLUMN_VTS_TS, COLUMN_CAKE_MOISTURE, COLUMN_SOLID_RECOVERY]
+
+                # Create the ordered list for selectbox options
+                # Start with preferred columns that are present in numeric_columns
+                ordered_numeric_columns = [col for col in preferred_columns if col in numeric_columns]
+
+                # Add the remaining numeric columns that are not in the preferred list, maintaining their original relative order
+                ordered_numeric_columns.extend([col for col in numeric_columns if col not in preferred_columns])
+
+                if ordered_numeric_columns:
+                    # Both panels read their statistics from one memoized engine per dataset
+                    stats_engine = store_view if store_view is not None else get_dataset_artifact(df, "grouped_stats", lambda: GroupedStatsEngine(df))
+                    # Approximate mode merges per-cell quantile sketches instead of sorting the selected rows
+                    approximate = store_view is None and st.sidebar.checkbox(texts["approximate_stats"], value=False, help=texts["approximate_stats_help"], key="approximate_stats")
+                    sketches = get_dataset_artifact(
+                        df, "quantile_sketches", lambda: QuantileSketches(df, FILTER_COLUMNS, MEASUREMENT_COLUMNS)
+                    ) if approximate else None
+
+                    # Create 2 columns for boxplot and summary stats side by side
+                    col_box1, col_box2 = st.columns(2)
+
+                    with col_box1:
+                        # Boxplot 1: by Main Category
+                        st.subheader(texts["boxplot1"])
+                        # Use the ordered list for options
+                        value_col_main = st.selectbox(
+                            texts["select_numeric"],
+                            ordered_numeric_columns,
+                            key="boxplot1_value",
+                            format_func=lambda col: TRANSLATOR.column(col, lang)
+                        )
+                        show_outliers_main = st.checkbox(texts["show_outliers"], value=False, key="outliers_main")
+                        show_zeros_main = st.checkbox(texts["show_zeros"], value=False, key="show_zeros_main")
+
+                        # Ensure 'Main Category' column exists before creating the boxplot
+                        if COLUMN_MAIN_CATEGORY in df.columns:
+                            if value_col_main:
+                                # Filter out 0 and NaN values for specific columns if selected (NaNs are always skipped)
+                                drop_zeros_main = value_col_main in ZERO_FILTER_COLUMNS and not show_zeros_main
+                                with stage("grouped_stats_main", rows_in=total_count) as stats_stage:
+                                    engine_main = sketches if sketches is not None and value_col_main in sketches.measures else stats_engine
+                                    grouped_main = engine_main.get(filter_key, row_positions, COLUMN_MAIN_CATEGORY, value_col_main, drop_zeros_main)
+                                    stats_stage.rows_out = len(grouped_main.stats)
+                                grouped_main = translate_grouped_stats(grouped_main, COLUMN_MAIN_CATEGORY, lang)
+                                group_label_main = TRANSLATOR.column(COLUMN_MAIN_CATEGORY, lang)
+                                value_label_main = TRANSLATOR.column(value_col_main, lang)
+
+                                # Create boxplot with categories sorted by count from server-side quartiles
+                                with stage("boxplot_main", rows_in=len(grouped_main.stats)):
+                                    fig_main = build_grouped_boxplot(grouped_main, COLUMN_MAIN_CATEGORY, value_col_main, lang, show_outliers_main)
+                                    st.plotly_chart(fig_main, use_container_width=True, config={'scrollZoom': True})
+                                if "rank_error" in grouped_main.stats.columns and len(grouped_main.stats):
+                                    st.caption(texts["approximate_caption"].format(error=grouped_main.stats["rank_error"].max() * 100))
+
+                                st.markdown("---") # Add a separator
+
+                                # Summary stats: by Main Category
+                                st.subheader(texts["summary_stats"].format(col=value_label_main, group=group_label_main))
+                                try:
+                                    # Same pass as the boxplot above, no extra scan of the data
+                                    with stage("describe_main", rows_in=len(grouped_main.stats)):
+                                        grouped_stats_main = grouped_main.describe()
+                                        st.dataframe(grouped_stats_main)
+                                    st.download_button(
+                                        texts["download_stats"],
+                                        data=lambda table=grouped_stats_main: export_table(table, export_format),
+                                        file_name=export_file_name(f"{value_label_main}_{group_label_main}", export_format),
+                                        mime=EXPORT_FORMATS[export_format][1],
+                                        on_click="ignore",
+                                        key="download_stats_main"
+                                    )
+
+                                except Exception as e:
+                                    st.error(texts["error"].format(msg=str(e)))
+                        else:
+                             st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_MAIN_CATEGORY, lang)))
+
+
+                    with col_box2:
+                        # Boxplot 2: by Sub Category
+                        st.subheader(texts["boxplot2"])
+                        # Use the ordered list for options
+                        value_col_sub = st.selectbox(
+                            texts["select_numeric"],
+                            ordered_numeric_columns,
+                            key="boxplot2_value",
+                            format_func=lambda col: TRANSLATOR.column(col, lang)
+                        )
+                        show_outliers_sub = st.checkbox(texts["show_outliers"], value=False, key="outliers_sub")
+                        show_zeros_sub = st.checkbox(texts["show_zeros"], value=False, key="show_zeros_sub")
+
+                        # Ensure 'Sub Category' column exists before creating the boxplot
+                        if COLUMN_SUB_CATEGORY in df.columns:
+                            if value_col_sub:
+                                # Filter out 0 and NaN values for specific columns if selected (NaNs are always skipped)
+                                drop_zeros_sub = value_col_sub in ZERO_FILTER_COLUMNS and not show_zeros_sub
+                                with stage("grouped_stats_sub", rows_in=total_count) as stats_stage:
+                                    engine_sub = sketches if sketches is not None and value_col_sub in sketches.measures else stats_engine
+                                    grouped_sub = engine_sub.get(filter_key, row_positions, COLUMN_SUB_CATEGORY, value_col_sub, drop_zeros_sub)
+                                    stats_stage.rows_out = len(grouped_sub.stats)
+                                grouped_sub = translate_grouped_stats(grouped_sub, COLUMN_SUB_CATEGORY, lang)
+                                group_label_sub = TRANSLATOR.column(COLUMN_SUB_CATEGORY, lang)
+                                value_label_sub = TRANSLATOR.column(value_col_sub, lang)
+
+                                # Create boxplot with categories sorted by count from server-side quartiles
+                                with stage("boxplot_sub", rows_in=len(grouped_sub.stats)):
+                                    fig_sub = build_grouped_boxplot(grouped_sub, COLUMN_SUB_CATEGORY, value_col_sub, lang, show_outliers_sub)
+                                    st.plotly_chart(fig_sub, use_container_width=True, config={'scrollZoom': True})
+                                if "rank_error" in grouped_sub.stats.columns and len(grouped_sub.stats):
+                                    st.caption(texts["approximate_caption"].format(error=grouped_sub.stats["rank_error"].max() * 100))
+
+                                st.markdown("---") # Add a separator
+
+                                # Summary stats: by Sub Category
+                                st.subheader(texts["summary_stats"].format(col=value_label_sub, group=group_label_sub))
+                                try:
+                                    # Same pass as the boxplot above, no extra scan of the data
+                                    with stage("describe_sub", rows_in=len(grouped_sub.stats)):
+                                        grouped_stats_sub = grouped_sub.describe()
+                                        st.dataframe(grouped_stats_sub)
+                                    st.download_button(
+                                        texts["download_stats"],
+                                        data=lambda table=grouped_stats_sub: export_table(table, export_format),
+                                        file_name=export_file_name(f"{value_label_sub}_{group_label_sub}", export_format),
+                                        mime=EXPORT_FORMATS[export_format][1],
+                                        on_click="ignore",
+                                        key="download_stats_sub"
+                                    )
+
+                                except Exception as e:
+                                    st.error(texts["error"].format(msg=str(e)))
+                        else:
+                             st.warning(texts["warning_missing_col"].format(col=TRANSLATOR.column(COLUMN_SUB_CATEGORY, lang)))
 
-            # Display filtered data
-            st.header("Filtered Data")
-            st.dataframe(filtered_df)
+                else:
+                    st.warning(texts["no_numeric"])
+
+                # Display filtered data one page at a time; only the visible page is sent to the browser
+                st.header(texts["filtered_data"])
+                table_view = get_dataset_artifact(df, "table_view", lambda: TableView(df)) if store_view is None else None
+                all_columns = df.columns.tolist()
+                col_table1, col_table2, col_table3, col_table4 = st.columns([3, 2, 1, 1])
+                with col_table1:
+                    table_columns = st.multiselect(
+                        texts["table_columns"],
+                        options=all_columns,
+                        default=all_columns,
+                        format_func=lambda col: TRANSLATOR.column(col, lang),
+                        key="table_columns"
+                    )
+                with col_table2:
+                    sort_col = st.selectbox(
+                        texts["table_sort_by"],
+                        [None] + all_columns,
+                        format_func=lambda col: texts["table_no_sort"] if col is None else TRANSLATOR.column(col, lang),
+                        key="table_sort_by"
+                    )
+                    sort_descending = st.checkbox(texts["table_descending"], value=False, key="table_descending")
+                with col_table3:
+                    page_size = st.selectbox(texts["table_page_size"], PAGE_SIZES, index=2, key="table_page_size")
+                n_pages = page_count(total_count, page_size)
+                with col_table4:
+                    page_number = st.number_input(texts["table_page"], min_value=1, max_value=n_pages, value=1, step=1, key="table_page")
+
+                with stage("table", rows_in=total_count) as table_stage:
+                    if table_view is not None:
+                        # The order is cached per filter state, so paging does not sort again
+                        ordered_positions = table_view.order(filter_key, row_positions, sort_col, ascending=not sort_descending)
+                        page_df = table_view.page(ordered_positions, int(page_number), page_size, table_columns)
+                        # The export reads the same rows in the same order, one chunk at a time
+                        export_rows = lambda: frame_chunks(df, ordered_positions, table_columns)
+                    else:
+                        page_df = store_view.page(filter_key, sort_col, not sort_descending, int(page_number), page_size, table_columns)
+                        export_rows = lambda: store_view.iter_rows(filter_key, sort_col, not sort_descending, table_columns)
+                    st.dataframe(to_arrow(TRANSLATOR.translate_frame(page_df, lang)), hide_index=True)
+                    table_stage.rows_out = len(page_df)
+                page_start = (int(page_number) - 1) * page_size
+                st.caption(texts["table_rows"].format(
+                    start=min(page_start + 1, total_count),
+                    end=page_start + len(page_df),
+                    total=total_count
+                ))
+                st.download_button(
+                    texts["download_data"],
+                    data=lambda: export_bytes((TRANSLATOR.translate_frame(chunk, lang) for chunk in export_rows()), export_format),
+                    file_name=export_file_name(texts["filtered_data"], export_format),
+                    mime=EXPORT_FORMATS[export_format][1],
+                    on_click="ignore",
+                    key="download_data"
+                )
+    finally:
+        # Also after an exception or a stopped rerun, so memory tracking is always switched off again
+        if profiler is not None:
+            profiler.finish()
+
+    if profiler is not None:
+        with st.expander(texts["diagnostics_header"], expanded=True):
+            st.caption(texts["diagnostics_total"].format(seconds=profiler.total_seconds))
+            st.dataframe(profiler.to_frame(), hide_index=True)
+            registry_stats = get_default_registry(MEMORY_BUDGET_BYTES).stats()
+            st.caption(texts["diagnostics_registry"].format(
+                datasets=len(registry_stats["datasets"]),
+                used=registry_stats["memory_bytes"] / 1024 ** 2,
+                budget=registry_stats["memory_budget_bytes"] / 1024 ** 2,
+                hits=registry_stats["hits"],
+                misses=registry_stats["misses"],
+                evictions=registry_stats["evictions"]
+            ))
+            st.dataframe(pd.DataFrame(registry_stats["datasets"]), hide_index=True)
 
 if __name__ == "__main__":
     main()
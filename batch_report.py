@@ -0,0 +1,269 @@
+"""Headless report pack: the dashboard's charts and tables for a grid of filter combinations.
+
+For every combination of one value per grid column (plus "all values" for each
+column), the report contains what the dashboard shows for that selection: the
+count chart of every ``CHART_TYPE_OPTIONS`` dimension and, for every
+measurement column, the Main and Sub Category boxplots with their describe()
+tables. Figures are written as HTML (and PNG when kaleido is installed), tables
+as Excel and/or CSV, and an ``index.html`` links everything:
+
+    python batch_report.py inquiries.xlsx --output report-2024-05 --lang ja
+    python batch_report.py inquiries.xlsx --grid "Dewatering Machine Type" "Order Status" --figures html png
+
+The workbook is parsed and cleaned once, through ``load_dataset`` and the
+ingestion cache. Combinations are rendered on a process pool. Each worker
+receives the cleaned frame once, builds its filter index, count cube and
+grouped-statistics engine once, and reuses them for all of its jobs. Where the
+platform can fork, the frame is inherited from the parent instead of copied.
+"""
+import argparse
+import html
+import itertools
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_all_start_methods, get_context
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from app import (
+    CHART_TYPE_OPTIONS,
+    COLUMN_MACHINE_TYPE,
+    COLUMN_MAIN_CATEGORY,
+    COLUMN_ORDER_STATUS,
+    COLUMN_SUB_CATEGORY,
+    FILTER_COLUMNS,
+    MEASUREMENT_COLUMNS,
+    TRANSLATOR,
+    ZERO_FILTER_COLUMNS,
+    build_grouped_boxplot,
+    build_summary_chart,
+    load_dataset,
+    translate_grouped_stats,
+)
+from count_cube import CountCube
+from export import file_stem
+from filter_index import FilterIndex, filter_signature
+from grouped_stats import GroupedStatsEngine
+
+try:
+    import kaleido  # noqa: F401  (used by plotly's write_image)
+    PNG_AVAILABLE = True
+except ImportError:
+    PNG_AVAILABLE = False
+
+DEFAULT_GRID = [COLUMN_MACHINE_TYPE, COLUMN_ORDER_STATUS]
+BOXPLOT_GROUPS = [COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY]
+FIGURE_FORMATS = ["html", "png"]
+TABLE_FORMATS = ["xlsx", "csv"]
+
+
+class ReportJob(NamedTuple):
+    """One filter combination of the report."""
+    name: str
+    directory: str
+    selections: Dict  # column -> [value]; columns left out are not filtered
+    lang: str
+    value_columns: List[str]
+    figure_formats: Tuple[str, ...]
+    table_formats: Tuple[str, ...]
+
+
+def filter_grid(filter_index: FilterIndex, columns: List[str], include_all: bool = True) -> List[Dict]:
+    """Return the selections of every combination of one value per grid column.
+       With ``include_all`` each column can also be left unfiltered (the first combination selects everything)."""
+    choices = []
+    for col in columns:
+        options = [[value] for value in filter_index.values(col)]
+        choices.append(([None] if include_all else []) + options)
+    return [
+        {col: values for col, values in zip(columns, combination) if values is not None}
+        for combination in itertools.product(*choices)
+    ]
+
+
+def selection_name(selections: Dict, lang: str) -> str:
+    if not selections:
+        return "all" if lang == "en" else "全体"
+    return ", ".join(
+        f"{TRANSLATOR.column(col, lang)}: {', '.join(str(TRANSLATOR.value(col, value, lang)) for value in values)}"
+        for col, values in selections.items()
+    )
+
+
+# Dataset and aggregates of the current worker process, set once by init_worker
+_worker: Dict = {}
+
+
+def init_worker(df: pd.DataFrame) -> None:
+    """Build the per-dataset structures once per worker; every job of the worker reuses them."""
+    # The charts are built outside of a Streamlit server; its "missing ScriptRunContext" warnings are noise here
+    logging.disable(logging.WARNING)
+    _worker["df"] = df
+    _worker["filter_index"] = FilterIndex(df, FILTER_COLUMNS)
+    _worker["count_cube"] = CountCube(df, FILTER_COLUMNS)
+    _worker["stats_engine"] = GroupedStatsEngine(df)
+
+
+def render_job(job: ReportJob) -> Dict:
+    """Write the figures and tables of one combination; returns its row count and written files."""
+    df = _worker["df"]
+    count_cube = _worker["count_cube"]
+    os.makedirs(job.directory, exist_ok=True)
+    files: List[str] = []
+
+    def save_figure(fig, stem: str) -> None:
+        for fmt in job.figure_formats:
+            path = os.path.join(job.directory, f"{stem}.{fmt}")
+            if fmt == "html":
+                fig.write_html(path, include_plotlyjs="cdn")
+            else:
+                fig.write_image(path)
+            files.append(path)
+
+    for chart_type in CHART_TYPE_OPTIONS:
+        if chart_type in count_cube.dimensions:
+            fig = build_summary_chart(None, chart_type, cube=count_cube, selections=job.selections, lang=job.lang)
+            if fig is not None:
+                save_figure(fig, f"count_{file_stem(chart_type)}")
+
+    # Same statistics as the boxplot panels with their default settings (zeros hidden where the app hides them)
+    filter_key = filter_signature(job.selections)
+    positions = _worker["filter_index"].select(job.selections)
+    tables: Dict[str, pd.DataFrame] = {}
+    for group_col in BOXPLOT_GROUPS:
+        if group_col not in df.columns:
+            continue
+        for value_col in job.value_columns:
+            grouped = _worker["stats_engine"].get(filter_key, positions, group_col, value_col, value_col in ZERO_FILTER_COLUMNS)
+            grouped = translate_grouped_stats(grouped, group_col, job.lang)
+            stem = f"{file_stem(group_col)}_{file_stem(value_col)}"
+            save_figure(build_grouped_boxplot(grouped, group_col, value_col, job.lang), f"boxplot_{stem}")
+            tables[stem] = grouped.describe()
+
+    if "csv" in job.table_formats:
+        for stem, table in tables.items():
+            path = os.path.join(job.directory, f"describe_{stem}.csv")
+            # utf-8-sig so that Excel opens Japanese labels correctly
+            table.to_csv(path, encoding="utf-8-sig")
+            files.append(path)
+    if "xlsx" in job.table_formats and tables:
+        path = os.path.join(job.directory, "describe.xlsx")
+        with pd.ExcelWriter(path) as writer:
+            for i, (stem, table) in enumerate(tables.items(), start=1):
+                # Sheet names are limited to 31 characters
+                table.to_excel(writer, sheet_name=f"{i} {stem}"[:31])
+        files.append(path)
+    return {"name": job.name, "directory": job.directory, "rows": len(positions), "files": files}
+
+
+def write_index(output_dir: str, results: List[Dict], title: str) -> str:
+    """Write index.html linking the files of every combination."""
+    sections = []
+    for result in results:
+        links = "".join(
+            f'<li><a href="{html.escape(os.path.relpath(path, output_dir))}">{html.escape(os.path.basename(path))}</a></li>'
+            for path in result["files"]
+        )
+        sections.append(f"<h2>{html.escape(result['name'])} ({result['rows']:,})</h2><ul>{links}</ul>")
+    path = os.path.join(output_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>"
+                f"<body><h1>{html.escape(title)}</h1>{''.join(sections)}</body></html>")
+    return path
+
+
+def build_report(
+    source: str,
+    output_dir: str,
+    grid: List[str],
+    lang: str = "en",
+    value_columns: Optional[List[str]] = None,
+    figure_formats: Tuple[str, ...] = ("html",),
+    table_formats: Tuple[str, ...] = ("xlsx", "csv"),
+    include_all: bool = True,
+    skip_empty: bool = True,
+    max_workers: Optional[int] = None,
+) -> List[Dict]:
+    """Render the report for every grid combination of the workbook ``source`` into ``output_dir``."""
+    # Raises with the actual cause (missing file, corrupt workbook, ...) instead of reporting it in a page
+    df = load_dataset(source)
+    value_columns = [col for col in (value_columns or MEASUREMENT_COLUMNS) if col in df.columns]
+    grid = [col for col in grid if col in df.columns]
+    filter_index = FilterIndex(df, grid)
+    count_cube = CountCube(df, FILTER_COLUMNS)
+
+    jobs = []
+    for selections in filter_grid(filter_index, grid, include_all):
+        if skip_empty and count_cube.total(selections) == 0:
+            continue
+        name = selection_name(selections, lang)
+        directory = os.path.join(output_dir, f"{len(jobs) + 1:03d}_{file_stem(name)}")
+        jobs.append(ReportJob(name, directory, selections, lang, value_columns, tuple(figure_formats), tuple(table_formats)))
+    os.makedirs(output_dir, exist_ok=True)
+
+    results: List[Optional[Dict]] = [None] * len(jobs)
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        init_worker(df)
+        for i, job in enumerate(jobs):
+            results[i] = render_job(job)
+            print(f"[{i + 1}/{len(jobs)}] {job.name}", file=sys.stderr)
+    else:
+        # Forked workers inherit the frame; spawned ones receive it once through the initializer
+        context = get_context("fork" if "fork" in get_all_start_methods() else "spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(df,)) as pool:
+            futures = {pool.submit(render_job, job): i for i, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                print(f"[{done}/{len(jobs)}] {jobs[futures[future]].name}", file=sys.stderr)
+
+    summary = pd.DataFrame([{key: result[key] for key in ("name", "rows", "directory")} for result in results])
+    summary.to_csv(os.path.join(output_dir, "summary.csv"), index=False, encoding="utf-8-sig")
+    write_index(output_dir, results, os.path.basename(str(source)))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render the dashboard's charts and tables for a grid of filter combinations.")
+    parser.add_argument("workbook", help="Excel workbook with the inquiries")
+    parser.add_argument("--output", default="report", help="output directory")
+    parser.add_argument("--grid", nargs="+", default=DEFAULT_GRID, choices=FILTER_COLUMNS, metavar="COLUMN",
+                        help=f"filter columns to enumerate (default: {', '.join(DEFAULT_GRID)})")
+    parser.add_argument("--no-totals", action="store_true", help="leave out the combinations where a grid column is unfiltered")
+    parser.add_argument("--keep-empty", action="store_true", help="also render combinations without any rows")
+    parser.add_argument("--values", nargs="+", default=MEASUREMENT_COLUMNS, metavar="COLUMN", help="measurement columns of the boxplots")
+    parser.add_argument("--lang", choices=["en", "ja"], default="en", help="language of the labels")
+    parser.add_argument("--figures", nargs="+", choices=FIGURE_FORMATS, default=["html"], help="figure formats")
+    parser.add_argument("--tables", nargs="*", choices=TABLE_FORMATS, default=TABLE_FORMATS, help="table formats")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if "png" in args.figures and not PNG_AVAILABLE:
+        parser.error("PNG figures need the kaleido package (pip install kaleido)")
+
+    logging.disable(logging.WARNING)
+    try:
+        results = build_report(
+            args.workbook,
+            args.output,
+            args.grid,
+            lang=args.lang,
+            value_columns=args.values,
+            figure_formats=tuple(args.figures),
+            table_formats=tuple(args.tables),
+            include_all=not args.no_totals,
+            skip_empty=not args.keep_empty,
+            max_workers=args.workers,
+        )
+    except Exception as e:
+        # e.g. FileNotFoundError, or zipfile.BadZipFile for a file that is not a workbook
+        print(f"error: could not build the report from {args.workbook}: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    print(f"{len(results)} combinations written to {os.path.join(args.output, 'index.html')}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
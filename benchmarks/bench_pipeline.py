@@ -0,0 +1,220 @@
+"""Stage timings of the inquiry pipeline at several scales.
+
+Every stage the dashboard runs on a rerun is timed separately on synthetic data
+(see ``benchmarks.synthetic``): Excel parsing, cleaning, filtering, aggregation
+and figure building. Each stage is run ``--repeat`` times for the wall time
+(the minimum is reported) and once more under ``tracemalloc`` for the peak
+allocated memory. Results are written as JSON so runs on different commits can
+be compared:
+
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --output base.json
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --compare base.json
+
+Writing and parsing workbooks is slow, so the Excel stages only run up to
+``--excel-max-rows`` rows (an .xlsx sheet cannot hold more than 1,048,576 rows
+anyway); larger scales start from the generated frame.
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app import (
+    CLEANING_CONFIG,
+    COLUMN_MACHINE_TYPE,
+    COLUMN_MAIN_CATEGORY,
+    COLUMN_ORDER_STATUS,
+    COLUMN_SOLID_RECOVERY,
+    COLUMN_SUB_CATEGORY,
+    FILTER_COLUMNS,
+    MEASUREMENT_COLUMNS,
+    STREAMING_CHUNK_ROWS,
+    build_summary_chart,
+    clean_data,
+)
+from benchmarks.synthetic import category_selection, generate_inquiries, write_workbook
+from box_stats import box_figure_from_stats
+from count_cube import CountCube
+from excel_stream import read_excel_streaming
+from filter_index import FilterIndex, take_rows
+from grouped_stats import GroupedStatsEngine
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_EXCEL_MAX_ROWS = 100_000
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict:
+    """Run ``fn`` ``repeat`` times for timing and once under tracemalloc for its peak allocation."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "seconds_all": timings, "peak_bytes": peak}
+
+
+def workbook_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    write_workbook(df, buffer)
+    return buffer.getvalue()
+
+
+def run_scale(n_rows: int, seed: int, repeat: int, excel_max_rows: int, lang: str = "en") -> List[Dict]:
+    """Benchmark every stage on ``n_rows`` synthetic rows and return one record per stage."""
+    records: List[Dict] = []
+
+    def record(stage: str, fn: Callable[[], object], rows_in: int, **extra) -> object:
+        result = fn()
+        stats = measure(fn, repeat)
+        rows_out = len(result) if hasattr(result, "__len__") and not isinstance(result, (str, bytes)) else None
+        records.append(dict({"rows": n_rows, "stage": stage, "rows_in": rows_in, "rows_out": rows_out}, **stats, **extra))
+        print(f"{n_rows:>10,} {stage:<24} {stats['seconds']:9.4f}s {stats['peak_bytes'] / 1024 ** 2:9.1f} MiB", file=sys.stderr)
+        return result
+
+    raw = generate_inquiries(n_rows, seed=seed, lang=lang)
+
+    if n_rows <= excel_max_rows:
+        data = workbook_bytes(raw)
+        record("parse_read_excel", lambda: pd.read_excel(io.BytesIO(data)), n_rows, workbook_bytes=len(data))
+        record("parse_streaming", lambda: read_excel_streaming(
+            data,
+            columns=FILTER_COLUMNS + MEASUREMENT_COLUMNS,
+            numeric_columns=CLEANING_CONFIG["numeric_columns"],
+            chunk_size=STREAMING_CHUNK_ROWS,
+            column_aliases=CLEANING_CONFIG["column_aliases"]
+        ), n_rows, workbook_bytes=len(data))
+
+    df = record("clean", lambda: clean_data(raw), n_rows)
+    del raw
+
+    # A typical selection: one order status and the most frequent values of the category filters
+    selections = category_selection(df, [COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY, COLUMN_MACHINE_TYPE])
+    selections[COLUMN_ORDER_STATUS] = [True]
+
+    # memo_size=0 so every select() evaluates the bitmaps instead of hitting the memo
+    filter_index = record("filter_index_build", lambda: FilterIndex(df, FILTER_COLUMNS, memo_size=0), n_rows)
+    positions = filter_index.select(selections)
+    record("filter_select", lambda: take_rows(df, filter_index.select(selections)), n_rows)
+
+    cube = record("count_cube_build", lambda: CountCube(df, FILTER_COLUMNS), n_rows)
+    record("count_cube_query", lambda: cube.counts_by([COLUMN_MAIN_CATEGORY, COLUMN_MACHINE_TYPE], selections), n_rows)
+
+    # A fresh engine per call, so the column extraction is part of the measurement
+    grouped = record(
+        "grouped_stats",
+        lambda: GroupedStatsEngine(df).get("bench", positions, COLUMN_MAIN_CATEGORY, COLUMN_SOLID_RECOVERY, True),
+        len(positions)
+    )
+    record("describe", grouped.describe, len(positions))
+
+    record("summary_chart", lambda: build_summary_chart(None, COLUMN_MAIN_CATEGORY, cube=cube, selections=selections, lang=lang), n_rows)
+
+    def build_boxplot() -> str:
+        fig = box_figure_from_stats(
+            grouped.stats,
+            COLUMN_MAIN_CATEGORY,
+            COLUMN_SOLID_RECOVERY,
+            points=grouped.outliers,
+            category_order=grouped.category_order()
+        )
+        # Serialization is what the browser waits for, so it is part of the stage
+        return fig.to_json()
+
+    payload = build_boxplot()
+    record("boxplot_figure", build_boxplot, len(positions), payload_bytes=len(payload))
+    return records
+
+
+def environment() -> Dict:
+    """Describe the commit and interpreter the benchmark ran on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(results: List[Dict], baseline: List[Dict]) -> List[Dict]:
+    """Return the time and peak-memory ratio (current / baseline) of every stage present in both runs."""
+    previous = {(r["rows"], r["stage"]): r for r in baseline}
+    rows = []
+    for r in results:
+        base = previous.get((r["rows"], r["stage"]))
+        if base is None:
+            continue
+        rows.append({
+            "rows": r["rows"],
+            "stage": r["stage"],
+            "time_ratio": r["seconds"] / base["seconds"] if base["seconds"] else None,
+            "memory_ratio": r["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else None,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the inquiry pipeline stages on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="dataset sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data generator")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (the minimum is reported)")
+    parser.add_argument("--excel-max-rows", type=int, default=DEFAULT_EXCEL_MAX_ROWS,
+                        help="largest size for which the Excel parsing stages run")
+    parser.add_argument("--lang", choices=["en", "ja"], default="en", help="language of the generated category values")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    # The charts are built outside of a Streamlit server; its "missing ScriptRunContext" warnings are noise here
+    logging.disable(logging.WARNING)
+
+    results = []
+    for n_rows in args.rows:
+        results.extend(run_scale(n_rows, args.seed, args.repeat, args.excel_max_rows, args.lang))
+    report = {
+        "environment": environment(),
+        "parameters": {"rows": args.rows, "seed": args.seed, "repeat": args.repeat,
+                       "excel_max_rows": args.excel_max_rows, "lang": args.lang},
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f)["results"])
+        for row in report["comparison"]:
+            print(f"{row['rows']:>10,} {row['stage']:<24} time x{row['time_ratio'] or 0:.2f} "
+                  f"memory x{row['memory_ratio'] or 0:.2f}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Accuracy and speed of the approximate (sketch) statistics against the exact path.
+
+For every scale, random filter selections are drawn and the boxplot statistics
+of every measurement column by Main and Sub Category are computed both by
+``GroupedStatsEngine`` (exact) and ``QuantileSketches`` (approximate). The report
+gives the build cost of the sketches, the query times of both paths and, for the
+quartiles, the observed rank error next to the bound the sketches report:
+
+    python -m benchmarks.bench_sketch --rows 100000 1000000 --points-per-cell 32 64 128
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app import COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY, FILTER_COLUMNS, MEASUREMENT_COLUMNS, clean_data
+from benchmarks.bench_pipeline import environment, measure
+from benchmarks.synthetic import generate_inquiries
+from box_stats import encode_categories, numeric_values
+from filter_index import FilterIndex, filter_signature
+from grouped_stats import GroupedStatsEngine
+from quantile_sketch import DEFAULT_POINTS_PER_CELL, QuantileSketches
+
+DEFAULT_ROWS = [100_000, 1_000_000]
+QUARTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+
+
+def random_selections(filter_index: FilterIndex, n: int, seed: int) -> List[Dict]:
+    """Return ``n`` selections: no filter first, then random subsets of the filter values."""
+    rng = np.random.default_rng(seed)
+    selections = [{}]
+    while len(selections) < n:
+        selection = {}
+        for col in filter_index.columns:
+            values = filter_index.values(col)
+            if values and rng.random() < 0.5:
+                size = int(rng.integers(1, min(len(values), 3) + 1))
+                selection[col] = [values[i] for i in rng.choice(len(values), size=size, replace=False)]
+        selections.append(selection)
+    return selections
+
+
+def rank_error(sorted_values: np.ndarray, estimate: float, q: float) -> float:
+    """Distance, as a fraction of the group size, between the ranks of ``estimate`` and of the q-quantile.
+       The exact quantile interpolates between two neighbouring ranks, so both sides are rank intervals."""
+    n = len(sorted_values)
+    target = q * (n - 1)
+    first = np.searchsorted(sorted_values, estimate, side="left")
+    last = np.searchsorted(sorted_values, estimate, side="right") - 1
+    # A value between two data points lies between their ranks (last < first then)
+    low, high = min(first, last), max(first, last)
+    return max(low - np.ceil(target), np.floor(target) - high, 0.0) / n
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_scale(n_rows: int, points_per_cell: int, seed: int, repeat: int, n_selections: int) -> Dict:
+    df = clean_data(generate_inquiries(n_rows, seed=seed))
+    filter_index = FilterIndex(df, FILTER_COLUMNS)
+    build = measure(lambda: QuantileSketches(df, FILTER_COLUMNS, MEASUREMENT_COLUMNS, points_per_cell), 1)
+    # max_entries=0 disables the memoized results, so every timed call computes
+    exact = GroupedStatsEngine(df, max_entries=0)
+    sketches = QuantileSketches(df, FILTER_COLUMNS, MEASUREMENT_COLUMNS, points_per_cell, max_entries=0)
+
+    group_codes = {col: encode_categories(df[col]) for col in (COLUMN_MAIN_CATEGORY, COLUMN_SUB_CATEGORY)}
+    column_values = {col: numeric_values(df[col]) for col in MEASUREMENT_COLUMNS}
+    exact_seconds, sketch_seconds, errors, bounds, quartile_diffs = [], [], [], [], []
+    for selection in random_selections(filter_index, n_selections, seed):
+        positions = filter_index.select(selection)
+        key = filter_signature(selection)
+        for group_col, (codes, labels) in group_codes.items():
+            for value_col in MEASUREMENT_COLUMNS:
+                exact_seconds.append(best_time(lambda: exact.get(key, positions, group_col, value_col, True), repeat))
+                sketch_seconds.append(best_time(lambda: sketches.get(key, positions, group_col, value_col, True), repeat))
+                truth = exact.get(key, positions, group_col, value_col, True).stats
+                approx = sketches.get(key, positions, group_col, value_col, True).stats
+                selected_codes = codes[positions]
+                selected_values = column_values[value_col][positions]
+                for label in truth.index:
+                    group_values = selected_values[(selected_codes == labels.get_loc(label)) & (selected_values != 0)]
+                    group_values = np.sort(group_values[~np.isnan(group_values)])
+                    bounds.append(approx.at[label, "rank_error"])
+                    for column, q in QUARTILES.items():
+                        errors.append(rank_error(group_values, approx.at[label, column], q))
+                        spread = truth.at[label, "75%"] - truth.at[label, "25%"]
+                        if spread > 0:
+                            quartile_diffs.append(abs(approx.at[label, column] - truth.at[label, column]) / spread)
+
+    summary = sketches._summaries[MEASUREMENT_COLUMNS[0]]
+    record = {
+        "rows": n_rows,
+        "points_per_cell": points_per_cell,
+        "cells": int(len(summary.cells)),
+        "points": int(len(summary.points)),
+        "sketch_bytes": sketches.nbytes,
+        "build_seconds": build["seconds"],
+        "build_peak_bytes": build["peak_bytes"],
+        "exact_query_seconds_median": float(np.median(exact_seconds)),
+        "sketch_query_seconds_median": float(np.median(sketch_seconds)),
+        "speedup_median": float(np.median(np.array(exact_seconds) / np.array(sketch_seconds))),
+        "rank_error_max": float(max(errors, default=0.0)),
+        "rank_error_mean": float(np.mean(errors)) if errors else 0.0,
+        "rank_error_bound_max": float(max(bounds, default=0.0)),
+        "quartile_error_iqr_max": float(max(quartile_diffs, default=0.0)),
+    }
+    print(f"{n_rows:>10,} k={points_per_cell:<4} exact {record['exact_query_seconds_median'] * 1000:8.2f} ms "
+          f"sketch {record['sketch_query_seconds_median'] * 1000:8.2f} ms  rank error max {record['rank_error_max']:.4f} "
+          f"(bound {record['rank_error_bound_max']:.4f})", file=sys.stderr)
+    return record
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the sketch statistics with the exact ones on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="dataset sizes to benchmark")
+    parser.add_argument("--points-per-cell", type=int, nargs="+", default=[DEFAULT_POINTS_PER_CELL],
+                        help="summary sizes to compare")
+    parser.add_argument("--selections", type=int, default=5, help="random filter selections per scale")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data generator and the selections")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query (the minimum is reported)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    results = [
+        run_scale(n_rows, points_per_cell, args.seed, args.repeat, args.selections)
+        for n_rows in args.rows
+        for points_per_cell in args.points_per_cell
+    ]
+    text = json.dumps({"environment": environment(), "parameters": vars(args), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Cold-start cost of the app: import time, time to the upload prompt and to the first chart.
+
+Every sample runs in a fresh interpreter, as on a new server worker. The child
+process imports Streamlit and the app, runs ``app.main()`` outside of a
+Streamlit server until the upload prompt is drawn (``st.file_uploader``), then
+cleans a small synthetic dataset and builds the count chart and a boxplot
+panel. When warm-up is enabled, the chart is timed after the background warm-up
+has finished, which stands for the time a user takes to choose a file. The
+report gives the median and minimum of every phase over ``--repeat`` processes,
+the heavy modules already imported when the prompt was drawn, and the slowest
+imports of ``import app`` (from ``python -X importtime``):
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --output startup.json
+
+This module imports nothing heavy at the top, so that the child processes start cold.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Modules whose import time the app defers until they are needed
+HEAVY_MODULES = ["numpy", "pandas", "pyarrow", "plotly.express", "openpyxl"]
+DEFAULT_REPEAT = 5
+DEFAULT_ROWS = 1_000
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe(rows: int, warm_up: bool) -> Dict:
+    """Measure the phases of one cold start in this process (meant to run in a fresh interpreter)."""
+    start = time.perf_counter()
+    import logging
+    import streamlit as st
+    timings = {"import_streamlit": time.perf_counter() - start}
+    # app.main() runs outside of a Streamlit server; its "missing ScriptRunContext" warnings are noise here
+    logging.disable(logging.WARNING)
+    os.environ["DEHYDRATOR_WARM_UP"] = "1" if warm_up else "0"
+
+    mark = time.perf_counter()
+    import app
+    timings["import_app"] = time.perf_counter() - mark
+
+    # The upload prompt is the first thing a user waits for; record when main() draws it
+    rendered = {}
+
+    def file_uploader(*args, **kwargs):
+        rendered["seconds"] = time.perf_counter() - start
+        rendered["modules"] = [name for name in HEAVY_MODULES if name in sys.modules]
+        return []
+
+    st.file_uploader = file_uploader
+    mark = time.perf_counter()
+    app.main()
+    timings["main_without_data"] = time.perf_counter() - mark
+    timings["first_render"] = rendered["seconds"]
+
+    import startup
+    if warm_up:
+        thread = startup._warm_up["thread"]
+        if thread is not None:
+            thread.join()
+        timings["warm_up"] = startup.warm_up_seconds()
+
+    mark = time.perf_counter()
+    from benchmarks.synthetic import generate_inquiries
+    from count_cube import CountCube
+    from filter_index import filter_signature
+    from grouped_stats import GroupedStatsEngine
+    df = app.clean_data(generate_inquiries(rows, seed=0))
+    cube = CountCube(df, app.FILTER_COLUMNS)
+    app.build_summary_chart(None, app.COLUMN_MAIN_CATEGORY, cube=cube, selections={}, lang="en")
+    grouped = GroupedStatsEngine(df).get(filter_signature({}), None, app.COLUMN_MAIN_CATEGORY, app.COLUMN_SLUDGE_CONCENTRATION)
+    app.build_grouped_boxplot(grouped, app.COLUMN_MAIN_CATEGORY, app.COLUMN_SLUDGE_CONCENTRATION).to_plotly_json()
+    timings["first_chart"] = time.perf_counter() - mark
+    return {"timings": timings, "modules_at_first_render": rendered["modules"]}
+
+
+def run_cold(rows: int, warm_up: bool) -> Dict:
+    """Run ``probe`` in a fresh interpreter; also report the wall time of the whole process."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--probe", "--rows", str(rows)] + ([] if warm_up else ["--no-warm-up"]),
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout)
+    result["timings"]["process"] = time.perf_counter() - start
+    return result
+
+
+def slowest_imports(module: str = "app", top: int = 10) -> List[Dict]:
+    """Return the imports of ``module`` with the largest cumulative time (python -X importtime)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    entries, inside = [], False
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # Only the imports made by ``module`` (they are listed before it, after streamlit's)
+        if name.strip() == "streamlit":
+            inside = True
+            continue
+        if inside and name.strip() != module:
+            entries.append({"module": name.strip(), "depth": (len(name) - len(name.lstrip())) // 2, "cumulative_seconds": int(parts[1]) / 1e6})
+    return sorted(entries, key=lambda e: e["cumulative_seconds"], reverse=True)[:top]
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    phases = samples[0]["timings"].keys()
+    return {
+        phase: {
+            "median": sorted(s["timings"][phase] for s in samples)[len(samples) // 2],
+            "min": min(s["timings"][phase] for s in samples),
+        }
+        for phase in phases
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold-start time of the app in fresh processes.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="cold processes per configuration")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows of the dataset of the first chart")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-warm-up", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.rows, warm_up=not args.no_warm_up)))
+        return 0
+
+    report = {"parameters": {"repeat": args.repeat, "rows": args.rows}, "configurations": {}}
+    for warm_up in (False, True):
+        samples = [run_cold(args.rows, warm_up) for _ in range(args.repeat)]
+        name = "warm_up" if warm_up else "lazy_only"
+        report["configurations"][name] = {
+            "phases": summarize(samples),
+            "modules_at_first_render": samples[-1]["modules_at_first_render"],
+        }
+        phases = report["configurations"][name]["phases"]
+        print(f"{name:<10} process {phases['process']['median']:.3f}s  first render {phases['first_render']['median']:.3f}s  "
+              f"import app {phases['import_app']['median']:.3f}s  first chart {phases['first_chart']['median']:.3f}s", file=sys.stderr)
+    report["slowest_imports"] = slowest_imports()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Seeded generator of synthetic inquiry data.
+
+The frames look like real exports: category values come from the vocabularies
+in ``language_dict`` with a skewed (Zipf-like) frequency and the measurement
+columns contain NaNs, zeros and junk strings the way hand-maintained workbooks
+do.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import language_dict
+from app import (
+    COLUMN_CAKE_MOISTURE,
+    COLUMN_MACHINE_TYPE,
+    COLUMN_MAIN_CATEGORY,
+    COLUMN_ORDER_STATUS,
+    COLUMN_SLUDGE_CONCENTRATION,
+    COLUMN_SOLID_RECOVERY,
+    COLUMN_SUB_CATEGORY,
+    COLUMN_VTS_TS,
+)
+
+# Strings that show up in the numeric columns of real workbooks
+JUNK_VALUES = ["", " ", "-", "n/a", "不明", "未測定", "?"]
+
+
+def zipf_probabilities(n: int, exponent: float = 1.1) -> np.ndarray:
+    """Return skewed probabilities for n categories (the first category is the most frequent)."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _measurement(rng: np.random.Generator, n: int, kind: str) -> np.ndarray:
+    if kind == "sludge":
+        return np.round(rng.lognormal(mean=0.7, sigma=0.6, size=n), 2)
+    if kind == "vts":
+        return np.round(np.clip(rng.normal(70, 12, size=n), 5, 99), 1)
+    if kind == "moisture":
+        return np.round(np.clip(rng.normal(82, 4, size=n), 55, 98), 1)
+    return np.round(np.clip(rng.normal(96, 3, size=n), 60, 100), 1)
+
+
+def _dirty(rng: np.random.Generator, values: np.ndarray, nan_rate: float, zero_rate: float, junk_rate: float) -> np.ndarray:
+    """Inject NaNs, zeros and junk strings; the column becomes an object array when junk is present."""
+    draw = rng.random(len(values))
+    values = values.copy()
+    values[draw < nan_rate] = np.nan
+    values[(draw >= nan_rate) & (draw < nan_rate + zero_rate)] = 0.0
+    junk = (draw >= nan_rate + zero_rate) & (draw < nan_rate + zero_rate + junk_rate)
+    if not junk.any():
+        return values
+    values = values.astype(object)
+    values[junk] = rng.choice(np.asarray(JUNK_VALUES, dtype=object), size=int(junk.sum()))
+    return values
+
+
+def generate_inquiries(
+    n_rows: int,
+    seed: int = 0,
+    lang: str = "en",
+    nan_rate: float = 0.08,
+    zero_rate: float = 0.05,
+    junk_rate: float = 0.02,
+    skew: float = 1.1,
+) -> pd.DataFrame:
+    """Return ``n_rows`` synthetic inquiries with the app's (English) column names.
+
+    Category values are taken from ``language_dict`` in ``lang``. The same seed
+    always produces the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    main = language_dict.MAIN_CATEGORIES[lang]
+    sub = language_dict.SUB_CATEGORIES[lang]
+    machines = language_dict.DEWATERING_MACHINE_TYPES[lang]
+
+    # Shuffle the vocabularies so the most frequent value is not always the first one in the list
+    main_order = rng.permutation(len(main))
+    sub_order = rng.permutation(len(sub))
+    data: Dict[str, object] = {
+        COLUMN_ORDER_STATUS: rng.random(n_rows) < 0.3,
+        COLUMN_MAIN_CATEGORY: np.asarray(main, dtype=object)[main_order][
+            rng.choice(len(main), size=n_rows, p=zipf_probabilities(len(main), skew))],
+        COLUMN_SUB_CATEGORY: np.asarray(sub, dtype=object)[sub_order][
+            rng.choice(len(sub), size=n_rows, p=zipf_probabilities(len(sub), skew))],
+        COLUMN_MACHINE_TYPE: np.asarray(machines, dtype=object)[
+            rng.choice(len(machines), size=n_rows, p=[0.55, 0.35, 0.10])],
+    }
+    for col, kind in [
+        (COLUMN_SLUDGE_CONCENTRATION, "sludge"),
+        (COLUMN_VTS_TS, "vts"),
+        (COLUMN_CAKE_MOISTURE, "moisture"),
+        (COLUMN_SOLID_RECOVERY, "recovery"),
+    ]:
+        data[col] = _dirty(rng, _measurement(rng, n_rows, kind), nan_rate, zero_rate, junk_rate)
+
+    df = pd.DataFrame(data)
+    # Some inquiries have no category at all
+    missing = rng.random(n_rows) < 0.01
+    df.loc[missing, COLUMN_SUB_CATEGORY] = np.nan
+    return df
+
+
+def write_workbook(df: pd.DataFrame, path: str) -> None:
+    """Write a generated frame as an .xlsx workbook (first sheet, header row, no index)."""
+    df.to_excel(path, index=False)
+
+
+def category_selection(df: pd.DataFrame, columns: List[str], per_column: int = 2) -> Dict[str, List]:
+    """Return a typical multiselect state: the ``per_column`` most frequent values of each column."""
+    return {col: df[col].value_counts().index[:per_column].tolist() for col in columns}
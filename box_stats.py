@@ -0,0 +1,300 @@
+"""Server-side boxplot and summary statistics.
+
+Instead of handing every raw row to ``px.box`` (which serializes all values into
+the browser payload and lets the client compute the quartiles), the statistics
+are computed here in one vectorized pass over the values sorted by
+(category, value), and the figure is built from those summary arrays. The same
+pass also yields the ``describe()`` columns shown in the summary tables.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, Union
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
+
+# Upper bound on the number of individual points sent to the browser per figure
+MAX_BOX_POINTS = 5000
+
+# Whisker length in IQRs, as used by Plotly
+WHISKER_IQR = 1.5
+
+# Columns of the summary table, named like DataFrame.describe()
+DESCRIBE_COLUMNS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def encode_categories(series: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Return (codes, labels) for a category column; missing values get code -1."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    codes, labels = pd.factorize(series, use_na_sentinel=True)
+    return codes, pd.Index(labels)
+
+
+def numeric_values(series: pd.Series) -> np.ndarray:
+    """Return a column as a float64 array with NaN for missing or non-numeric values."""
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def grouped_quantiles(values: np.ndarray, bounds: np.ndarray, q: float) -> np.ndarray:
+    """Return the q-quantile of every group using linear interpolation (same as pandas/numpy defaults).
+       ``values`` must be sorted within each group; empty groups yield NaN."""
+    starts = bounds[:-1]
+    sizes = np.diff(bounds)
+    result = np.full(len(sizes), np.nan)
+    nonempty = sizes > 0
+    rank = q * (sizes[nonempty] - 1)
+    lower = np.floor(rank).astype(np.int64)
+    upper = np.ceil(rank).astype(np.int64)
+    frac = rank - lower
+    base = starts[nonempty]
+    lo_values = values[base + lower]
+    hi_values = values[base + upper]
+    result[nonempty] = lo_values + (hi_values - lo_values) * frac
+    return result
+
+
+def summarize_groups(codes: np.ndarray, values: np.ndarray, labels: pd.Index, name: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Compute describe() and boxplot statistics for every group in one sort-based pass.
+
+    ``codes`` are the group codes (-1 for missing) and ``values`` the measurements
+    (NaN for missing) of the same rows. Returns ``(stats, outliers)``: ``stats`` is
+    indexed by label with the DESCRIBE_COLUMNS plus lowerfence and upperfence
+    (groups without values are left out); ``outliers`` has the label (column
+    ``name``) and value of every point beyond the whiskers.
+    """
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes = codes[keep]
+    values = values[keep]
+    order = np.lexsort((values, codes))
+    codes = codes[order]
+    values = values[order]
+    bounds = np.searchsorted(codes, np.arange(len(labels) + 1))
+
+    sizes = np.diff(bounds)
+    nonempty = sizes > 0
+    starts = bounds[:-1][nonempty]
+    ends = bounds[1:][nonempty]
+    q1 = grouped_quantiles(values, bounds, 0.25)
+    median = grouped_quantiles(values, bounds, 0.5)
+    q3 = grouped_quantiles(values, bounds, 0.75)
+
+    mean = np.full(len(sizes), np.nan)
+    std = np.full(len(sizes), np.nan)
+    minimum = np.full(len(sizes), np.nan)
+    maximum = np.full(len(sizes), np.nan)
+    lowerfence = np.full(len(sizes), np.nan)
+    upperfence = np.full(len(sizes), np.nan)
+    inside = np.ones(len(values), dtype=bool)
+    if len(values):
+        mean[nonempty] = np.add.reduceat(values, starts) / sizes[nonempty]
+        squared_dev = np.add.reduceat((values - mean[codes]) ** 2, starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Sample standard deviation (ddof=1) like describe(); NaN for single-value groups
+            std[nonempty] = np.where(sizes[nonempty] > 1, np.sqrt(squared_dev / (sizes[nonempty] - 1)), np.nan)
+        # Values are sorted within each group
+        minimum[nonempty] = values[starts]
+        maximum[nonempty] = values[ends - 1]
+
+        # A point is inside the whiskers if it lies within its own group's limits
+        iqr = q3 - q1
+        inside = (values >= (q1 - WHISKER_IQR * iqr)[codes]) & (values <= (q3 + WHISKER_IQR * iqr)[codes])
+        lowerfence[nonempty] = np.minimum.reduceat(np.where(inside, values, np.inf), starts)
+        upperfence[nonempty] = np.maximum.reduceat(np.where(inside, values, -np.inf), starts)
+
+    stats = pd.DataFrame(
+        {
+            "count": sizes,
+            "mean": mean,
+            "std": std,
+            "min": minimum,
+            "25%": q1,
+            "50%": median,
+            "75%": q3,
+            "max": maximum,
+            "lowerfence": lowerfence,
+            "upperfence": upperfence,
+        },
+        index=pd.Index(labels, name=name),
+    )[nonempty]
+    outliers = pd.DataFrame({name: labels.take(codes[~inside]), "value": values[~inside]})
+    return stats, outliers
+
+
+def summarize_weighted_groups(
+    codes: np.ndarray,
+    values: np.ndarray,
+    weights: np.ndarray,
+    labels: pd.Index,
+    name: str = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Same as ``summarize_groups`` for values given with repeat counts.
+
+    Each (code, value) pair stands for ``weights`` identical rows, e.g. the result
+    of ``GROUP BY group, value``. The statistics equal those of the expanded rows,
+    but the work is proportional to the number of distinct pairs.
+    """
+    keep = (codes >= 0) & ~np.isnan(values) & (weights > 0)
+    codes = codes[keep]
+    values = values[keep]
+    weights = weights[keep].astype(np.int64)
+    order = np.lexsort((values, codes))
+    codes = codes[order]
+    values = values[order]
+    weights = weights[order]
+    bounds = np.searchsorted(codes, np.arange(len(labels) + 1))
+
+    nonempty = np.diff(bounds) > 0
+    starts = bounds[:-1][nonempty]
+    ends = bounds[1:][nonempty]
+    cumulative = np.cumsum(weights)
+    # Number of rows in all groups before each group
+    offsets = np.concatenate([[0], cumulative])[bounds[:-1]]
+
+    count = np.zeros(len(labels), dtype=np.int64)
+    mean = np.full(len(labels), np.nan)
+    std = np.full(len(labels), np.nan)
+    minimum = np.full(len(labels), np.nan)
+    maximum = np.full(len(labels), np.nan)
+    lowerfence = np.full(len(labels), np.nan)
+    upperfence = np.full(len(labels), np.nan)
+    quartiles = [np.full(len(labels), np.nan) for _ in range(3)]
+    inside = np.ones(len(values), dtype=bool)
+    if len(values):
+        count[nonempty] = np.add.reduceat(weights, starts)
+        mean[nonempty] = np.add.reduceat(weights * values, starts) / count[nonempty]
+        squared_dev = np.add.reduceat(weights * (values - mean[codes]) ** 2, starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std[nonempty] = np.where(count[nonempty] > 1, np.sqrt(squared_dev / (count[nonempty] - 1)), np.nan)
+        minimum[nonempty] = values[starts]
+        maximum[nonempty] = values[ends - 1]
+
+        for quartile, q in zip(quartiles, (0.25, 0.5, 0.75)):
+            rank = q * (count[nonempty] - 1)
+            lower = np.floor(rank).astype(np.int64)
+            upper = np.ceil(rank).astype(np.int64)
+            # The value at row rank k of a group is the first distinct value whose cumulative count exceeds k
+            lo_values = values[np.searchsorted(cumulative, offsets[nonempty] + lower, side='right')]
+            hi_values = values[np.searchsorted(cumulative, offsets[nonempty] + upper, side='right')]
+            quartile[nonempty] = lo_values + (hi_values - lo_values) * (rank - lower)
+
+        q1, _, q3 = quartiles
+        iqr = q3 - q1
+        inside = (values >= (q1 - WHISKER_IQR * iqr)[codes]) & (values <= (q3 + WHISKER_IQR * iqr)[codes])
+        lowerfence[nonempty] = np.minimum.reduceat(np.where(inside, values, np.inf), starts)
+        upperfence[nonempty] = np.maximum.reduceat(np.where(inside, values, -np.inf), starts)
+
+    stats = pd.DataFrame(
+        {
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "min": minimum,
+            "25%": quartiles[0],
+            "50%": quartiles[1],
+            "75%": quartiles[2],
+            "max": maximum,
+            "lowerfence": lowerfence,
+            "upperfence": upperfence,
+        },
+        index=pd.Index(labels, name=name),
+    )[nonempty]
+    outlier_weights = weights[~inside]
+    outliers = pd.DataFrame({
+        name: labels.take(np.repeat(codes[~inside], outlier_weights)),
+        "value": np.repeat(values[~inside], outlier_weights),
+    })
+    return stats, outliers
+
+
+def compute_box_stats(df: pd.DataFrame, category_col: str, value_col: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Compute boxplot and describe() statistics of ``value_col`` per ``category_col`` in a DataFrame."""
+    codes, labels = encode_categories(df[category_col])
+    stats, outliers = summarize_groups(codes, numeric_values(df[value_col]), labels, category_col)
+    return stats, outliers.rename(columns={"value": value_col})
+
+
+def category_order(stats: pd.DataFrame) -> List:
+    """Return the categories of a stats frame, most frequent first."""
+    return stats["count"].sort_values(ascending=False, kind="stable").index.tolist()
+
+
+def sample_points(points: pd.DataFrame, max_points: int = MAX_BOX_POINTS, seed: int = 0) -> pd.DataFrame:
+    """Return at most ``max_points`` rows, sampled reproducibly so reruns show the same points."""
+    if len(points) <= max_points:
+        return points
+    return points.sample(n=max_points, random_state=seed)
+
+
+def box_figure_from_stats(
+    stats: pd.DataFrame,
+    category_col: str,
+    value_col: str,
+    points: Optional[pd.DataFrame] = None,
+    category_order: Optional[List] = None,
+    title: Optional[str] = None,
+    max_points: int = MAX_BOX_POINTS,
+) -> go.Figure:
+    """Build a boxplot from precomputed statistics.
+       ``points`` (category, value) are drawn as markers, capped at ``max_points``."""
+    if category_order is not None:
+        stats = stats.reindex([c for c in category_order if c in stats.index])
+
+    fig = go.Figure()
+    fig.add_trace(go.Box(
+        x=stats.index.tolist(),
+        q1=stats["25%"].to_numpy(),
+        median=stats["50%"].to_numpy(),
+        q3=stats["75%"].to_numpy(),
+        lowerfence=stats["lowerfence"].to_numpy(),
+        upperfence=stats["upperfence"].to_numpy(),
+        name=value_col,
+        boxpoints=False,
+        showlegend=False,
+    ))
+
+    if points is not None and not points.empty:
+        shown = sample_points(points, max_points)
+        fig.add_trace(go.Scatter(
+            x=shown.iloc[:, 0].astype(object).tolist(),
+            y=shown.iloc[:, 1].to_numpy(),
+            mode='markers',
+            marker=dict(size=4, opacity=0.6),
+            name=value_col,
+            showlegend=False,
+        ))
+
+    fig.update_layout(
+        title=title or f"Boxplot of {value_col} by {category_col}",
+        xaxis_title=category_col,
+        yaxis_title=value_col,
+    )
+    fig.update_xaxes(categoryorder='array', categoryarray=stats.index.tolist())
+    return fig
+
+
+def build_box_figure(
+    df: pd.DataFrame,
+    category_col: str,
+    value_col: str,
+    points: Union[bool, str] = False,
+    category_order: Optional[List] = None,
+    title: Optional[str] = None,
+    max_points: int = MAX_BOX_POINTS,
+) -> go.Figure:
+    """Build a boxplot of a DataFrame from server-side statistics.
+
+    ``points`` is False (boxes only), 'outliers' (points beyond the whiskers) or
+    'all' (a random sample of at most ``max_points`` raw values).
+    """
+    stats, outliers = compute_box_stats(df, category_col, value_col)
+    if points == 'all':
+        shown = df[[category_col, value_col]].dropna()
+    elif points:
+        shown = outliers
+    else:
+        shown = None
+    return box_figure_from_stats(stats, category_col, value_col, shown, category_order, title, max_points)
@@ -0,0 +1,114 @@
+"""Pre-aggregated row counts over the low-cardinality filter dimensions.
+
+The cube is a dense N-dimensional array with one axis per dimension column
+(Order Status x Main Category x Sub Category x Machine Type in the app). Each
+axis has one slot per distinct value plus a trailing slot for missing values.
+It is computed once at load; totals and grouped counts for any combination of
+filters are then answered by slicing and summing the array, never by scanning
+the rows.
+"""
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class CountCube:
+    """Dense count cube over a fixed set of categorical dimensions of one DataFrame."""
+
+    def __init__(self, df: pd.DataFrame, dimensions: List[str]):
+        self.dimensions = [col for col in dimensions if col in df.columns]
+        self.labels: Dict[str, List[Hashable]] = {}
+        self._dtypes = {}
+        self._positions: Dict[str, Dict[Hashable, int]] = {}
+        axis_codes = []
+        for col in self.dimensions:
+            codes, labels = self._encode(df[col])
+            self.labels[col] = labels
+            self._dtypes[col] = df[col].dtype
+            self._positions[col] = {label: i for i, label in enumerate(labels)}
+            axis_codes.append(codes)
+        # One extra slot per axis for missing values
+        self.shape = tuple(len(self.labels[col]) + 1 for col in self.dimensions)
+        if self.dimensions:
+            flat = np.ravel_multi_index(axis_codes, self.shape)
+            self.counts = np.bincount(flat, minlength=int(np.prod(self.shape))).reshape(self.shape)
+        else:
+            self.counts = np.array(len(df))
+
+    @staticmethod
+    def _encode(series: pd.Series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy().astype(np.int64)
+            labels = list(series.cat.categories)
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            codes = codes.astype(np.int64)
+            labels = list(uniques)
+        # Missing values (code -1) go to the trailing slot
+        codes[codes < 0] = len(labels)
+        return codes, labels
+
+    def _selected_slots(self, col: str, selections: Optional[Dict[str, Iterable]]) -> List[int]:
+        """Return the axis slots of ``col`` kept by ``selections`` (all slots, including missing, if unselected)."""
+        values = (selections or {}).get(col)
+        if not values:
+            return list(range(len(self.labels[col]) + 1))
+        positions = self._positions[col]
+        return sorted({positions[v] for v in values if v in positions})
+
+    def _slice(self, selections: Optional[Dict[str, Iterable]]):
+        """Return the sub-cube restricted to ``selections`` and the slots kept on each axis."""
+        sub = self.counts
+        axis_slots = []
+        for axis, col in enumerate(self.dimensions):
+            slots = self._selected_slots(col, selections)
+            if len(slots) != self.shape[axis]:
+                sub = np.take(sub, slots, axis=axis)
+            axis_slots.append(slots)
+        return sub, axis_slots
+
+    def total(self, selections: Optional[Dict[str, Iterable]] = None) -> int:
+        """Return the number of rows matching ``selections`` (same semantics as FilterIndex)."""
+        return int(self._slice(selections)[0].sum())
+
+    def counts_by(self, group_by: List[str], selections: Optional[Dict[str, Iterable]] = None) -> pd.DataFrame:
+        """Return a frame with the ``group_by`` columns and a 'Count' column for the matching rows.
+           Only non-missing, non-zero groups are returned, like ``groupby(..., observed=True).size()``."""
+        sub, axis_slots = self._slice(selections)
+        group_axes = [self.dimensions.index(col) for col in group_by]
+        for axis, col in zip(group_axes, group_by):
+            # Rows with a missing group value are not counted in any group
+            slots = axis_slots[axis]
+            if slots and slots[-1] == len(self.labels[col]):
+                sub = np.take(sub, range(len(slots) - 1), axis=axis)
+                axis_slots[axis] = slots[:-1]
+
+        other_axes = tuple(axis for axis in range(len(self.dimensions)) if axis not in group_axes)
+        reduced = sub.sum(axis=other_axes) if other_axes else sub
+        # The remaining axes are in dimension order; reorder them to match group_by
+        remaining = sorted(group_axes)
+        reduced = np.transpose(reduced, [remaining.index(axis) for axis in group_axes])
+
+        nonzero = np.nonzero(reduced)
+        result = {}
+        for col, axis, idx in zip(group_by, group_axes, nonzero):
+            codes = np.asarray(axis_slots[axis], dtype=np.int64)[idx]
+            if isinstance(self._dtypes[col], pd.CategoricalDtype):
+                result[col] = pd.Categorical.from_codes(codes, dtype=self._dtypes[col])
+            else:
+                result[col] = pd.Index(self.labels[col]).take(codes)
+        result["Count"] = reduced[nonzero].astype(np.int64)
+        return pd.DataFrame(result)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.counts.nbytes)
+
+    def values(self, column: str) -> List[Hashable]:
+        """Return the distinct non-missing values of a dimension."""
+        return list(self.labels.get(column, []))
@@ -0,0 +1,176 @@
+"""Process-wide registry of cleaned datasets and their derived structures.
+
+Every Streamlit session that works on the same upload (same content hash)
+gets a reference to one shared frame instead of its own copy, together with the
+structures built from it once (filter index, count cube, grouped statistics,
+table view). Per-session state is then only the widget selections and the row
+positions they select.
+
+Shared frames must not be modified. Sessions receive shallow copies, so adding
+or replacing a column only affects their own copy, and pandas' copy-on-write
+keeps in-place edits of the values from reaching the shared data.
+
+The registry has a memory budget covering the frames and everything derived
+from them; least recently used datasets are dropped when it is exceeded. A
+dropped dataset stays alive for sessions still holding it and is registered
+again the next time one of them asks for it.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+from ingest_cache import frame_nbytes
+
+DEFAULT_MEMORY_BUDGET_BYTES = 1024 ** 3
+
+
+class _Entry:
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.frame_bytes = frame_nbytes(frame)
+        self.artifacts: Dict[str, object] = {}
+        # Serializes artifact builds so concurrent sessions build each one once
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+
+    def nbytes(self) -> int:
+        return self.frame_bytes + sum(getattr(artifact, "nbytes", 0) for artifact in list(self.artifacts.values()))
+
+
+class DatasetRegistry:
+    """Shared, memory-bounded LRU of datasets keyed by their content hash."""
+
+    def __init__(self, memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key being loaded, so a file uploaded by several sessions at once is parsed once
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _share(frame: pd.DataFrame) -> pd.DataFrame:
+        return frame.copy(deep=False)
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Return a shared view of the dataset registered under ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            self.hits += 1
+            return self._share(entry.frame)
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> pd.DataFrame:
+        """Register ``df`` under ``key`` (an existing entry is kept) and return a shared view."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(df)
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+        self._evict()
+        return self._share(entry.frame)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """Return the dataset for ``key``, calling ``loader`` on a miss (once, even for concurrent callers)."""
+        df = self.get(key)
+        if df is not None:
+            return df
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another session may have finished loading while this one waited
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return self.get(key)
+            with self._lock:
+                self.misses += 1
+            try:
+                df = loader()
+                # Registered before the loading lock is dropped, so a session arriving now finds the entry
+                return self.put(key, df) if df is not None else None
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def artifact(self, df: pd.DataFrame, name: str, builder: Callable[[], object]) -> object:
+        """Return the structure ``name`` derived from ``df``, building it once for all sessions.
+           ``df`` is identified by ``df.attrs["dataset_key"]``; an evicted dataset is registered again."""
+        key = df.attrs.get("dataset_key", id(df))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            self.put(key, df)
+            with self._lock:
+                entry = self._entries[key]
+        artifact = entry.artifacts.get(name)
+        if artifact is None:
+            with entry.lock:
+                artifact = entry.artifacts.get(name)
+                if artifact is None:
+                    artifact = builder()
+                    entry.artifacts[name] = artifact
+            self._evict()
+        return artifact
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = sum(entry.nbytes() for entry in self._entries.values())
+            # The most recently used dataset is kept even if it alone exceeds the budget
+            while total > self.memory_budget_bytes and len(self._entries) > 1:
+                _, entry = self._entries.popitem(last=False)
+                total -= entry.nbytes()
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the memory used by each registered dataset."""
+        with self._lock:
+            datasets: List[Dict] = [
+                {
+                    "dataset_key": str(key)[:12],
+                    "rows": len(entry.frame),
+                    "frame_bytes": entry.frame_bytes,
+                    "derived_bytes": entry.nbytes() - entry.frame_bytes,
+                    "artifacts": ", ".join(entry.artifacts),
+                    "last_used": time.strftime("%H:%M:%S", time.localtime(entry.last_used)),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_bytes": sum(d["frame_bytes"] + d["derived_bytes"] for d in datasets),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "datasets": datasets,
+            }
+
+
+_default_registry: Optional[DatasetRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry(memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES) -> DatasetRegistry:
+    """Return the process-wide registry shared by all Streamlit sessions."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = DatasetRegistry(memory_budget_bytes)
+        return _default_registry
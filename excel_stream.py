@@ -0,0 +1,162 @@
+"""Streaming, chunked reader for large .xlsx inquiry workbooks.
+
+``pd.read_excel`` builds the whole workbook in memory through openpyxl before
+any cleaning can happen, so peak memory is several times the file size. This
+reader uses openpyxl's read-only mode to walk the rows of one sheet, keeps only
+the requested columns and fills typed buffers chunk by chunk:
+
+- numeric columns are coerced with ``pd.to_numeric`` per chunk and stored as
+  float arrays,
+- all other columns are dictionary-encoded into integer codes and returned as
+  Categoricals.
+
+Peak memory is therefore bounded by the chunk size plus the compact column
+buffers, not by the size of the workbook.
+"""
+from __future__ import annotations
+
+import io
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from schema import header_lookup, header_token
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Called as progress_callback(rows_read, total_rows); total_rows is None when the sheet does not declare it
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def is_xlsx(data: bytes) -> bool:
+    """Return True if the bytes look like an Office Open XML (zip) workbook rather than a legacy .xls file."""
+    return data[:4] == b"PK\x03\x04"
+
+
+class _CategoryBuffer:
+    """Dictionary-encodes a column chunk by chunk."""
+
+    def __init__(self):
+        self.lookup: Dict = {}
+        self.categories: List = []
+        self.chunks: List[np.ndarray] = []
+
+    def append(self, values: List) -> None:
+        codes = np.empty(len(values), dtype=np.int32)
+        lookup = self.lookup
+        for i, value in enumerate(values):
+            if value is None or (isinstance(value, str) and not value.strip()):
+                codes[i] = -1
+                continue
+            code = lookup.get(value)
+            if code is None:
+                code = len(self.categories)
+                lookup[value] = code
+                self.categories.append(value)
+            codes[i] = code
+        self.chunks.append(codes)
+
+    def finish(self) -> pd.Categorical:
+        codes = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int32)
+        if len({type(c) for c in self.categories}) > 1:
+            # Mixed types (e.g. numbers and text in one column) cannot form a typed category index
+            categories = pd.Index(self.categories, dtype=object)
+        else:
+            categories = pd.Index(self.categories)
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+
+class _NumericBuffer:
+    """Coerces a column to floats chunk by chunk."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.chunks: List[np.ndarray] = []
+
+    def append(self, values: List) -> None:
+        coerced = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+        self.chunks.append(coerced.to_numpy(dtype=self.dtype, na_value=np.nan))
+
+    def finish(self) -> np.ndarray:
+        return np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=self.dtype)
+
+
+def read_excel_streaming(
+    source: Union[bytes, str, io.IOBase],
+    columns: Optional[Iterable[str]] = None,
+    numeric_columns: Iterable[str] = (),
+    sheet_name: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    numeric_dtype="float64",
+    progress_callback: Optional[ProgressCallback] = None,
+    column_aliases: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Read one sheet of an .xlsx workbook in fixed-size chunks.
+
+    The first row is the header. Only ``columns`` are kept (all columns if None;
+    requested columns missing from the sheet are skipped). ``numeric_columns`` are
+    coerced to ``numeric_dtype`` with non-numeric values becoming NaN; the other
+    columns are returned as Categoricals. The first sheet is read unless
+    ``sheet_name`` is given. Headers are matched to ``columns`` ignoring spacing
+    and case, and headers listed in ``column_aliases`` (e.g. Japanese headers)
+    are read under the canonical name they map to.
+    """
+    # Imported here so the app does not pay for openpyxl until a workbook is actually parsed
+    from openpyxl import load_workbook
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=list(columns or []))
+
+        # Map each wanted column to its position in the sheet (first occurrence wins)
+        lookup = header_lookup(columns or [], column_aliases)
+        positions: Dict[str, int] = {}
+        for i, name in enumerate(header):
+            if name is None:
+                continue
+            name = lookup.get(header_token(name), str(name).strip())
+            if name not in positions:
+                positions[name] = i
+        wanted = list(positions) if columns is None else [c for c in columns if c in positions]
+        numeric_set = set(numeric_columns)
+        buffers = {
+            col: _NumericBuffer(numeric_dtype) if col in numeric_set else _CategoryBuffer()
+            for col in wanted
+        }
+        wanted_positions = [positions[col] for col in wanted]
+
+        total_rows = worksheet.max_row - 1 if worksheet.max_row else None
+        pending: List[List] = [[] for _ in wanted]
+        rows_read = 0
+        for row in rows:
+            # Blank rows are skipped, as pd.read_excel does
+            if all(value is None for value in row):
+                continue
+            row_len = len(row)
+            for values, position in zip(pending, wanted_positions):
+                values.append(row[position] if position < row_len else None)
+            rows_read += 1
+            if rows_read % chunk_size == 0:
+                for col, values in zip(wanted, pending):
+                    buffers[col].append(values)
+                pending = [[] for _ in wanted]
+                if progress_callback is not None:
+                    progress_callback(rows_read, total_rows)
+        if pending and pending[0]:
+            for col, values in zip(wanted, pending):
+                buffers[col].append(values)
+        if progress_callback is not None:
+            progress_callback(rows_read, rows_read)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame({col: buffers[col].finish() for col in wanted})
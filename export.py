@@ -0,0 +1,163 @@
+"""Chunked export of the filtered rows and the summary tables.
+
+The rows are written in chunks of ``EXPORT_CHUNK_ROWS``: each chunk is taken
+from the dataset by position (in the table's order), relabelled if needed and
+appended to the output, so only one chunk is ever materialized besides the
+file being written. The output is spooled to a temporary file once it grows
+beyond ``EXPORT_SPOOL_BYTES`` instead of being kept in memory.
+
+Formats:
+- Parquet, one row group per chunk (``pyarrow.parquet.ParquetWriter``);
+- CSV, UTF-8 with a byte order mark so that Excel reads Japanese correctly;
+- Excel, through openpyxl's write-only mode, which streams rows to the file;
+  selections larger than an Excel sheet continue on further sheets.
+"""
+from __future__ import annotations
+
+import io
+import re
+import tempfile
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+from startup import lazy_import
+from table_view import objects_as_text
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_SPOOL_BYTES = 32 * 1024 ** 2
+# Rows per sheet below the header (Excel's limit is 1,048,576 rows)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv": (".csv", "text/csv"),
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def frame_chunks(
+    df: pd.DataFrame,
+    positions: Optional[np.ndarray] = None,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows at ``positions`` (all rows if None) in chunks, restricted to ``columns``.
+       ``transform`` is applied to every chunk (e.g. translation). At least one, possibly empty, chunk is yielded."""
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    n_rows = len(df) if positions is None else len(positions)
+    for start in range(0, max(n_rows, 1), chunk_rows):
+        if positions is None:
+            chunk = df.iloc[start:start + chunk_rows]
+        else:
+            chunk = df.iloc[positions[start:start + chunk_rows]]
+        yield transform(chunk) if transform is not None else chunk
+
+
+def parquet_schema(chunk: pd.DataFrame) -> pa.Schema:
+    """Schema of all chunks, from the first one; object columns (text after ``objects_as_text``) are strings
+       even when the first chunk holds only missing values in them."""
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for col in chunk.columns:
+        if pd.api.types.is_object_dtype(chunk[col].dtype):
+            i = schema.get_field_index(str(col))
+            schema = schema.set(i, schema.field(i).with_type(pa.string()))
+    return schema
+
+
+def write_parquet(chunks: Iterable[pd.DataFrame], out: BinaryIO) -> None:
+    writer = None
+    try:
+        for chunk in chunks:
+            # Arrow cannot convert object columns mixing numbers and strings (e.g. a free-text memo column)
+            chunk = objects_as_text(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(out, parquet_schema(chunk))
+            writer.write_table(pa.Table.from_pandas(chunk, preserve_index=False, schema=writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_csv(chunks: Iterable[pd.DataFrame], out: BinaryIO) -> None:
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(text, header=i == 0, index=False)
+        text.flush()
+    finally:
+        # Leave ``out`` open for the caller
+        text.detach()
+
+
+def _cell_values(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Python objects openpyxl can write, with None for missing values."""
+    values = chunk.astype(object)
+    return values.where(chunk.notna().to_numpy(), None)
+
+
+def write_excel(chunks: Iterable[pd.DataFrame], out: BinaryIO, sheet_name: str = "data") -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, header = None, 0, None
+    for chunk in chunks:
+        if header is None:
+            header = [str(col) for col in chunk.columns]
+        values = _cell_values(chunk)
+        start = 0
+        while sheet is None or start < len(values):
+            if sheet is None or sheet_rows == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(sheet_name if sheet is None else f"{sheet_name} {len(workbook.worksheets) + 1}")
+                sheet.append(header)
+                sheet_rows = 0
+            end = min(len(values), start + EXCEL_MAX_ROWS - sheet_rows)
+            for row in values.iloc[start:end].itertuples(index=False, name=None):
+                sheet.append(list(row))
+            sheet_rows += end - start
+            start = end
+    if sheet is None:
+        workbook.create_sheet(sheet_name)
+    workbook.save(out)
+
+
+WRITERS: Dict[str, Callable[[Iterable[pd.DataFrame], BinaryIO], None]] = {
+    "parquet": write_parquet,
+    "csv": write_csv,
+    "xlsx": write_excel,
+}
+
+
+def export_chunks(chunks: Iterable[pd.DataFrame], fmt: str) -> BinaryIO:
+    """Write ``chunks`` in format ``fmt`` and return the file, rewound (spooled to disk when large)."""
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    WRITERS[fmt](chunks, out)
+    out.seek(0)
+    return out
+
+
+def export_bytes(chunks: Iterable[pd.DataFrame], fmt: str) -> bytes:
+    """Return the file ``export_chunks`` writes, as bytes.
+       This is what a deferred ``st.download_button`` callable must return: Streamlit does not accept a spooled file."""
+    with export_chunks(chunks, fmt) as out:
+        return out.read()
+
+
+def export_table(table: pd.DataFrame, fmt: str) -> bytes:
+    """Return a (small) summary table in format ``fmt``; its index is written as the first column."""
+    return export_bytes([table.reset_index()], fmt)
+
+
+def file_stem(text: str, max_length: int = 80) -> str:
+    """Turn a label into a file name (letters of any script are kept)."""
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_")[:max_length] or "_"
+
+
+def export_file_name(label: str, fmt: str) -> str:
+    return file_stem(label) + EXPORT_FORMATS[fmt][0]
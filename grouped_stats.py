@@ -0,0 +1,111 @@
+"""Memoized grouped statistics for the boxplot panels.
+
+Both panels need the same things for their (filter, value column, group column)
+combination: the per-category quartiles and fences for the boxplot, the
+category ordering, and the describe() table. ``GroupedStatsEngine`` computes
+all of them in a single sort-based pass (see ``box_stats.summarize_groups``)
+directly from column arrays gathered by row position, without materializing a
+filtered DataFrame. Results are kept in an LRU keyed by
+(filter signature, value column, zero handling, group column), so changing one
+panel does not recompute the other.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from box_stats import DESCRIBE_COLUMNS, category_order, encode_categories, numeric_values, summarize_groups
+
+
+class GroupedStats(NamedTuple):
+    """Statistics of one value column grouped by one category column."""
+    stats: pd.DataFrame
+    outliers: pd.DataFrame
+
+    def category_order(self) -> List:
+        """Return the categories, most frequent first."""
+        return category_order(self.stats)
+
+    def describe(self) -> pd.DataFrame:
+        """Return the table equivalent to ``groupby(group)[value].describe()``."""
+        return self.stats[DESCRIBE_COLUMNS]
+
+
+class GroupedStatsEngine:
+    """Computes and memoizes GroupedStats for one dataset."""
+
+    def __init__(self, df: pd.DataFrame, max_entries: int = 64):
+        self._df = df
+        # Column arrays are extracted lazily, once per column
+        self._codes: Dict[str, Tuple[np.ndarray, pd.Index]] = {}
+        self._values: Dict[str, np.ndarray] = {}
+        self._cache: "OrderedDict[Hashable, GroupedStats]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the extracted column arrays and the memoized results."""
+        arrays = sum(codes.nbytes for codes, _ in self._codes.values()) + sum(v.nbytes for v in self._values.values())
+        with self._lock:
+            results = sum(
+                int(r.stats.memory_usage(deep=True).sum() + r.outliers.memory_usage(deep=True).sum())
+                for r in self._cache.values()
+            )
+        return arrays + results
+
+    def _group_codes(self, column: str) -> Tuple[np.ndarray, pd.Index]:
+        if column not in self._codes:
+            self._codes[column] = encode_categories(self._df[column])
+        return self._codes[column]
+
+    def _column_values(self, column: str) -> np.ndarray:
+        if column not in self._values:
+            self._values[column] = numeric_values(self._df[column])
+        return self._values[column]
+
+    def get(
+        self,
+        filter_key: Hashable,
+        positions: Optional[np.ndarray],
+        group_col: str,
+        value_col: str,
+        drop_zeros: bool = False,
+    ) -> GroupedStats:
+        """Return the statistics of ``value_col`` by ``group_col`` over the rows at ``positions``.
+
+        ``filter_key`` must identify ``positions`` (e.g. the filter signature); ``positions``
+        None means all rows. With ``drop_zeros`` zero values are excluded as well as missing ones.
+        """
+        key = (filter_key, value_col, drop_zeros, group_col)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        codes, labels = self._group_codes(group_col)
+        values = self._column_values(value_col)
+        if positions is not None:
+            codes = codes[positions]
+            values = values[positions]
+        if drop_zeros:
+            values = np.where(values == 0, np.nan, values)
+        stats, outliers = summarize_groups(codes, values, labels, group_col)
+        result = GroupedStats(stats, outliers.rename(columns={"value": value_col}))
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return result
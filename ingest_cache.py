@@ -0,0 +1,200 @@
+"""Content-addressed cache for cleaned inquiry DataFrames.
+
+Entries are keyed by a hash of the uploaded workbook bytes plus the cleaning
+configuration, so a Streamlit rerun (or a repeat upload of the same file) can
+reuse the cleaned frame without going through openpyxl again.
+
+There are two tiers:
+- an in-memory tier holding the DataFrame objects themselves, and
+- an optional on-disk tier storing one Parquet file per entry.
+
+Both tiers are bounded by a byte budget and evict least recently used entries.
+Cached frames are shared between callers and must be treated as read-only.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+# pyarrow (only needed for the Parquet tier) is looked up without importing it, which is slow
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+DEFAULT_MEMORY_BUDGET_BYTES = 512 * 1024 ** 2
+DEFAULT_DISK_BUDGET_BYTES = 2 * 1024 ** 3
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dehydrator4EN-JP", "ingest")
+
+
+def make_cache_key(data: bytes, config: Dict) -> str:
+    """Return a stable key for the given file contents and cleaning configuration."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Return the deep memory usage of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class IngestionCache:
+    """Two-tier (memory + Parquet) LRU cache of cleaned DataFrames."""
+
+    def __init__(
+        self,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    ):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        # The disk tier is disabled when no directory is given or pyarrow is missing
+        self.cache_dir = cache_dir if (cache_dir and PARQUET_AVAILABLE) else None
+        self._memory: "OrderedDict[str, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame for ``key`` or None if neither tier has it."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+
+        df = self._read_disk(key)
+        if df is not None:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            # Promote to the memory tier so the next rerun skips Parquet decoding
+            self._put_memory(key, df)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store ``df`` under ``key`` in both tiers."""
+        self._put_memory(key, df)
+        self._write_disk(key, df)
+
+    def get_or_load(self, key: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Return the cached frame for ``key``, calling ``loader`` to build it on a miss."""
+        df = self.get(key)
+        if df is not None:
+            return df
+        with self._lock:
+            self.stats["misses"] += 1
+        df = loader()
+        if df is not None:
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        """Drop every entry from the memory tier (the disk tier is left intact)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def _put_memory(self, key: str, df: pd.DataFrame) -> None:
+        size = frame_nbytes(df)
+        if size > self.memory_budget_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[1]
+            self._memory[key] = (df, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_budget_bytes and self._memory:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _read_disk(self, key: str) -> Optional[pd.DataFrame]:
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+            # Touch the file so eviction sees it as recently used
+            os.utime(path, None)
+            return df
+        except Exception:
+            # A truncated or unreadable entry is treated as a miss and removed
+            self._remove_file(path)
+            return None
+
+    def _write_disk(self, key: str, df: pd.DataFrame) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_parquet(tmp_path, index=True)
+            os.replace(tmp_path, path)
+        except Exception:
+            # Frames with mixed-type object columns cannot always be written as Parquet;
+            # the memory tier still serves them, so failing here is not fatal.
+            self._remove_file(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        # Oldest access time first
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_budget_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache: Optional[IngestionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> IngestionCache:
+    """Return the process-wide cache shared by all Streamlit sessions."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            # In memory, cleaned frames are held by the dataset registry; this cache keeps the Parquet tier
+            _default_cache = IngestionCache(memory_budget_bytes=0)
+        return _default_cache
@@ -22,6 +22,47 @@ LANGUAGES = {
         "error": "エラーが発生しました: {msg}",
         "warning_missing_col": "データに「{col}」列が見つかりませんでした。",
         "no_numeric": "箱ひげ図と要約統計量を作成できる数値項目が見つかりません。",
+        "read_all_sheets": "全シートを読み込む",
+        "read_all_sheets_help": "アップロードした全ファイルの全シートを結合します",
+        "memory_footprint": "メモリ使用量: 読込時 {before:.1f} MB、正規化後 {after:.1f} MB",
+        "count": "件数",
+        "count_by": "{col}別件数",
+        "boxplot_title": "{group}別 {col} の箱ひげ図",
+        "source": "ファイル / シート",
+        "diagnostics": "診断モード",
+        "diagnostics_help": "各処理の所要時間・行数・メモリを記録します",
+        "track_memory": "メモリも計測（遅くなります）",
+        "diagnostics_header": "診断情報",
+        "diagnostics_total": "再実行全体: {seconds:.3f} 秒",
+        "diagnostics_registry": "共有データセット: {datasets} 件, {used:.1f} / {budget:.0f} MiB (ヒット {hits}, ミス {misses}, 破棄 {evictions})",
+        "table_columns": "表示する列",
+        "table_sort_by": "並べ替え",
+        "table_no_sort": "（並べ替えなし）",
+        "table_descending": "降順",
+        "table_page_size": "1ページの行数",
+        "table_page": "ページ",
+        "table_rows": "{total:,} 行中 {start:,}–{end:,} 行目",
+        "stored_dataset": "保存済みデータセット",
+        "stored_none": "（ファイルをアップロード）",
+        "stored_label": "{name}（{rows:,} 行）",
+        "save_to_store": "共有ストアに保存",
+        "save_to_store_help": "他のユーザーがアップロードせずに開けるよう、整形済みデータを保存します",
+        "saving_to_store": "保存中...",
+        "saved_to_store": "{name} を保存しました（{rows:,} 行）",
+        "approximate_stats": "近似統計（高速）",
+        "approximate_stats_help": "四分位数を行の並べ替えではなくデータセットごとに一度作成するスケッチから求めます。件数・平均・標準偏差・最小・最大は正確です",
+        "approximate_caption": "近似値: 四分位数の順位誤差は最大 ±{error:.2f}%",
+        "append_header": "新しい問い合わせを追加",
+        "append_upload": "追加分のExcelファイル",
+        "append_key": "重複判定に使う列",
+        "append_key_help": "これらの列がすべて一致する行は既存の行とみなして追加しません",
+        "append_button": "追加",
+        "appending": "追加中...",
+        "appended": "{added:,} 行を追加しました（重複 {duplicates:,} 行を除外）",
+        "export_format": "ダウンロード形式",
+        "export_format_help": "データ表と統計表のダウンロードボタンのファイル形式",
+        "download_data": "フィルター後のデータをダウンロード",
+        "download_stats": "統計表をダウンロード",
     },
     "en": {
         "app_title": "📊 Inquiry Data Analysis APP",
@@ -46,6 +87,47 @@ LANGUAGES = {
         "error": "An error occurred: {msg}",
         "warning_missing_col": "Column '{col}' not found in data.",
         "no_numeric": "No numeric columns found for boxplot and summary stats.",
+        "read_all_sheets": "Read all sheets",
+        "read_all_sheets_help": "Combine every sheet of every uploaded file",
+        "memory_footprint": "Memory footprint: {before:.1f} MB as parsed, {after:.1f} MB after normalization",
+        "count": "Count",
+        "count_by": "Count by {col}",
+        "boxplot_title": "Boxplot of {col} by {group}",
+        "source": "Source",
+        "diagnostics": "Diagnostics",
+        "diagnostics_help": "Record the time, rows and memory of every processing stage",
+        "track_memory": "Also measure memory (slower)",
+        "diagnostics_header": "Diagnostics",
+        "diagnostics_total": "Whole rerun: {seconds:.3f} s",
+        "diagnostics_registry": "Shared datasets: {datasets}, {used:.1f} / {budget:.0f} MiB (hits {hits}, misses {misses}, evictions {evictions})",
+        "table_columns": "Columns",
+        "table_sort_by": "Sort by",
+        "table_no_sort": "(no sorting)",
+        "table_descending": "Descending",
+        "table_page_size": "Rows per page",
+        "table_page": "Page",
+        "table_rows": "Rows {start:,}–{end:,} of {total:,}",
+        "stored_dataset": "Stored dataset",
+        "stored_none": "(upload a file)",
+        "stored_label": "{name} ({rows:,} rows)",
+        "save_to_store": "Save to shared store",
+        "save_to_store_help": "Save the cleaned data so other users can open it without uploading",
+        "saving_to_store": "Saving...",
+        "saved_to_store": "Saved {name} ({rows:,} rows)",
+        "approximate_stats": "Approximate statistics (faster)",
+        "approximate_stats_help": "Quartiles come from sketches built once per dataset instead of sorting the selected rows; count, mean, std, min and max stay exact",
+        "approximate_caption": "Approximate: quartile rank error at most ±{error:.2f}%",
+        "append_header": "Append new inquiries",
+        "append_upload": "Excel file with the new rows",
+        "append_key": "Columns identifying an inquiry",
+        "append_key_help": "Rows matching an existing row on all of these columns are skipped as duplicates",
+        "append_button": "Append",
+        "appending": "Appending...",
+        "appended": "Added {added:,} rows ({duplicates:,} duplicates skipped)",
+        "export_format": "Download format",
+        "export_format_help": "File format of the download buttons of the data and statistics tables",
+        "download_data": "Download filtered data",
+        "download_stats": "Download statistics",
     }
 }
 
@@ -0,0 +1,119 @@
+"""Parallel ingestion of several workbooks and sheets.
+
+Every (file, sheet) pair is parsed in a separate worker process: the sheet is
+read (streamed for large .xlsx files), its headers are mapped onto the
+canonical column names and the numeric columns are coerced. The parent then
+concatenates the parts into one frame with a source column, so wall-clock time
+follows the slowest part rather than the sum of all parts.
+
+Workers only import this module and its pandas/openpyxl dependencies (not the
+Streamlit app), and everything they receive is plain picklable data.
+"""
+from __future__ import annotations
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+from excel_stream import is_xlsx, read_excel_streaming
+from schema import canonicalize_columns, coerce_numeric_columns
+
+
+class IngestJob(NamedTuple):
+    """One sheet of one uploaded workbook."""
+    file_name: str
+    data: bytes
+    sheet_name: Optional[str]  # None means the first sheet
+    source: str
+
+
+def list_sheets(data: bytes) -> List[str]:
+    """Return the sheet names of a workbook without loading its cells."""
+    if is_xlsx(data):
+        from openpyxl import load_workbook
+        workbook = load_workbook(io.BytesIO(data), read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    with pd.ExcelFile(io.BytesIO(data)) as excel_file:
+        return [str(name) for name in excel_file.sheet_names]
+
+
+def plan_jobs(files: List[Tuple[str, bytes]], all_sheets: bool) -> List[IngestJob]:
+    """Return one job per file (first sheet) or per (file, sheet) pair when ``all_sheets`` is set."""
+    jobs = []
+    for file_name, data in files:
+        if all_sheets:
+            for sheet in list_sheets(data):
+                jobs.append(IngestJob(file_name, data, sheet, f"{file_name} / {sheet}"))
+        else:
+            jobs.append(IngestJob(file_name, data, None, file_name))
+    return jobs
+
+
+def parse_job(job: IngestJob, config: Dict) -> pd.DataFrame:
+    """Parse one sheet and bring it onto the canonical schema (runs in a worker process).
+
+    ``config`` keys: canonical_columns, column_aliases, numeric_columns,
+    streaming_threshold_bytes, streaming_columns and chunk_size.
+    """
+    if len(job.data) >= config["streaming_threshold_bytes"] and is_xlsx(job.data):
+        # Streaming keeps only the analysis columns, matched through the same aliases
+        df = read_excel_streaming(
+            job.data,
+            columns=config["streaming_columns"],
+            numeric_columns=config["numeric_columns"],
+            sheet_name=job.sheet_name,
+            chunk_size=config["chunk_size"],
+            column_aliases=config.get("column_aliases")
+        )
+    else:
+        df = pd.read_excel(io.BytesIO(job.data), sheet_name=job.sheet_name if job.sheet_name is not None else 0)
+        df = canonicalize_columns(df, config["canonical_columns"], config.get("column_aliases"))
+    return coerce_numeric_columns(df, config["numeric_columns"])
+
+
+def ingest_workbooks(
+    jobs: List[IngestJob],
+    config: Dict,
+    source_column: str = "Source",
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> pd.DataFrame:
+    """Parse all jobs across a process pool and concatenate them with a ``source_column``.
+
+    Parts keep the order of ``jobs``; columns missing from some parts are filled with NaN.
+    ``progress_callback(done, total)`` is called as parts finish.
+    """
+    if not jobs:
+        return pd.DataFrame()
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    parts: List[Optional[pd.DataFrame]] = [None] * len(jobs)
+    if workers <= 1:
+        for i, job in enumerate(jobs):
+            parts[i] = parse_job(job, config)
+            if progress_callback is not None:
+                progress_callback(i + 1, len(jobs))
+    else:
+        # "spawn" because the Streamlit server is multi-threaded and forking it is unsafe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = {pool.submit(parse_job, job, config): i for i, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                parts[futures[future]] = future.result()
+                if progress_callback is not None:
+                    progress_callback(done, len(jobs))
+
+    for part, job in zip(parts, jobs):
+        part.insert(0, source_column, job.source)
+    combined = pd.concat(parts, ignore_index=True, sort=False)
+    # Keep the sources in upload order
+    sources = list(dict.fromkeys(job.source for job in jobs))
+    combined[source_column] = pd.Categorical(combined[source_column], categories=sources)
+    return combined
@@ -0,0 +1,220 @@
+"""Opt-in per-stage profiling of a dashboard rerun.
+
+Each stage of a rerun (parsing, filtering, charts, tables, ...) is wrapped in
+``stage(...)`` or decorated with ``@profiled(...)``. When profiling is enabled
+for the rerun (``start_run``), every stage records its wall time, the rows it
+received and produced and, optionally, the memory it allocated (through
+``tracemalloc``). The records can be shown in the app and appended as JSON lines
+to a log file.
+
+When profiling is disabled, ``stage`` returns a shared no-op context manager
+and ``profiled`` calls straight through, so the instrumented code pays one
+context-variable lookup per stage.
+"""
+from __future__ import annotations
+
+import datetime
+import functools
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+class StageTiming(NamedTuple):
+    """Measurements of one stage of a rerun."""
+    stage: str
+    depth: int  # 0 for top-level stages, 1 for stages nested in another stage, ...
+    seconds: float
+    rows_in: Optional[int]
+    rows_out: Optional[int]
+    memory_peak_bytes: Optional[int]  # peak allocation above the level at the start of the stage
+    memory_net_bytes: Optional[int]  # allocated and still alive when the stage ended
+
+
+class _NullStage:
+    """Stand-in used when profiling is off; attribute writes are ignored."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+# tracemalloc is process-wide, so it stays on while any session tracks memory
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class _Stage:
+    """Context manager measuring one stage; set ``rows_out`` inside the block."""
+
+    def __init__(self, profiler: "Profiler", name: str, rows_in: Optional[int]):
+        self.profiler = profiler
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.depth = 0
+        # Highest peak reached by nested stages (each of them resets the tracemalloc peak)
+        self.child_peak = 0
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        self.depth = len(stack)
+        if self.profiler.track_memory:
+            self.memory_start, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+            tracemalloc.reset_peak()
+        stack.append(self)
+        # Reserve the slot now so records are listed in the order the stages started
+        self.index = len(self.profiler.records)
+        self.profiler.records.append(None)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        stack = self.profiler._stack
+        stack.pop()
+        peak_bytes = net_bytes = None
+        if self.profiler.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            peak_bytes = max(peak - self.memory_start, 0)
+            net_bytes = current - self.memory_start
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        self.profiler.records[self.index] = StageTiming(
+            self.name, self.depth, seconds, self.rows_in, self.rows_out, peak_bytes, net_bytes
+        )
+        return False
+
+
+class Profiler:
+    """Collects the stage timings of one rerun."""
+
+    def __init__(self, track_memory: bool = False, log_path: Optional[str] = None, context: Optional[Dict] = None):
+        """``context`` is added to every logged line (e.g. the UI language or dataset key)."""
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.track_memory = track_memory
+        self.log_path = log_path
+        self.context = dict(context or {})
+        self.records: List[StageTiming] = []
+        self._stack: List[_Stage] = []
+        self._start = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        if track_memory:
+            _start_tracing()
+
+    def stage(self, name: str, rows_in: Optional[int] = None) -> _Stage:
+        return _Stage(self, name, rows_in)
+
+    def finish(self) -> List[StageTiming]:
+        """End the run: stop memory tracking and append the records to the log file (if any)."""
+        if self.total_seconds is not None:
+            return self.records
+        self.total_seconds = time.perf_counter() - self._start
+        if self.track_memory:
+            _stop_tracing()
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                for record in filter(None, self.records):
+                    line = dict(self.context, run_id=self.run_id, started_at=self.started_at.isoformat(), **record._asdict())
+                    f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+        return self.records
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the records as a DataFrame (nested stages are marked with their depth)."""
+        frame = pd.DataFrame(list(filter(None, self.records)), columns=StageTiming._fields)
+        frame["stage"] = [
+            name if depth == 0 else "　" * (depth - 1) + "└ " + name
+            for name, depth in zip(frame["stage"], frame["depth"])
+        ]
+        for col in ["rows_in", "rows_out", "memory_peak_bytes", "memory_net_bytes"]:
+            frame[col] = frame[col].astype("Int64")
+        return frame.drop(columns="depth")
+
+
+_current_profiler: ContextVar[Optional[Profiler]] = ContextVar("current_profiler", default=None)
+
+
+def start_run(enabled: bool, track_memory: bool = False, log_path: Optional[str] = None, context: Optional[Dict] = None) -> Optional[Profiler]:
+    """Start profiling the current rerun (or turn it off). Returns the profiler, or None when disabled."""
+    previous = _current_profiler.get()
+    if previous is not None:
+        # A rerun that was interrupted never reached finish(); release its memory tracking
+        previous.finish()
+    profiler = Profiler(track_memory, log_path, context) if enabled else None
+    _current_profiler.set(profiler)
+    return profiler
+
+
+def current_profiler() -> Optional[Profiler]:
+    return _current_profiler.get()
+
+
+def stage(name: str, rows_in: Optional[int] = None):
+    """Measure a block as a stage of the current rerun; a no-op when profiling is off."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name, rows_in)
+
+
+def row_count(value) -> Optional[int]:
+    """Number of rows of a DataFrame/Series/array result, None for anything else."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    shape = getattr(value, "shape", None)
+    return shape[0] if shape else None
+
+
+def profiled(name: Optional[str] = None) -> Callable:
+    """Decorator measuring every call of a function as a stage.
+       rows_in is taken from the first DataFrame argument and rows_out from the result."""
+    def decorator(fn: Callable) -> Callable:
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _current_profiler.get()
+            if profiler is None:
+                return fn(*args, **kwargs)
+            frame = next((a for a in list(args) + list(kwargs.values()) if isinstance(a, pd.DataFrame)), None)
+            with profiler.stage(stage_name, row_count(frame)) as measured:
+                result = fn(*args, **kwargs)
+                measured.rows_out = row_count(result)
+            return result
+        return wrapper
+    return decorator
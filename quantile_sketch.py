@@ -0,0 +1,228 @@
+"""Approximate grouped statistics from mergeable per-cell quantile summaries.
+
+At load time the rows are split into cells, one per combination of filter
+dimension values (as in ``CountCube``). For every cell and measurement column
+two small summaries are kept:
+
+- the moments of the non-zero values (count, mean, sum of squared deviations,
+  min, max) and the number of zeros, which merge exactly;
+- an equi-depth quantile summary: the sorted non-zero values are cut into
+  buckets of ``ceil(n / points_per_cell)`` consecutive values and each bucket is
+  kept as its middle value and its size. Cells with at most ``points_per_cell``
+  values are kept exactly.
+
+A query merges the summaries of the selected cells of each group, so its cost
+follows the number of cells, not rows. Count, mean, std, min and max are exact;
+the quartiles and whiskers come from the weighted bucket values
+(``box_stats.summarize_weighted_groups``). A bucket misplaces a value's rank by
+at most half its size, so the rank error of a group's quantiles is bounded by
+the sum of the half bucket sizes of its cells. The bound is returned per group,
+as a fraction of the group's count, in the ``rank_error`` column.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from box_stats import WHISKER_IQR, encode_categories, numeric_values, summarize_weighted_groups
+from grouped_stats import GroupedStats
+
+DEFAULT_POINTS_PER_CELL = 64
+
+
+class _MeasureSummary(NamedTuple):
+    """Summaries of one measurement column, one entry per non-empty cell."""
+    cells: np.ndarray  # flat cell id
+    count: np.ndarray  # non-zero values
+    mean: np.ndarray  # of the non-zero values, 0 for cells without any
+    m2: np.ndarray  # sum of squared deviations from the mean
+    minimum: np.ndarray  # +inf for cells without non-zero values
+    maximum: np.ndarray  # -inf for cells without non-zero values
+    zeros: np.ndarray
+    half_bucket: np.ndarray  # largest rank error of the cell's summary
+    point_cell: np.ndarray  # index into cells of every summary point
+    points: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self)
+
+
+def summarize_cells(cell_ids: np.ndarray, values: np.ndarray, points_per_cell: int) -> _MeasureSummary:
+    """Build the moments and equi-depth summaries of ``values`` (NaN for missing) per cell."""
+    valid = ~np.isnan(values)
+    cells, inverse = np.unique(cell_ids[valid], return_inverse=True)
+    values = values[valid]
+    zero = values == 0
+    zeros = np.bincount(inverse[zero], minlength=len(cells))
+
+    cell_index = inverse[~zero]
+    values = values[~zero]
+    order = np.lexsort((values, cell_index))
+    cell_index = cell_index[order]
+    values = values[order]
+    bounds = np.searchsorted(cell_index, np.arange(len(cells) + 1))
+    starts, ends = bounds[:-1], bounds[1:]
+    count = np.diff(bounds)
+    nonempty = count > 0
+
+    mean = np.zeros(len(cells))
+    mean[nonempty] = np.bincount(cell_index, weights=values, minlength=len(cells))[nonempty] / count[nonempty]
+    m2 = np.bincount(cell_index, weights=(values - mean[cell_index]) ** 2, minlength=len(cells))
+    minimum = np.full(len(cells), np.inf)
+    maximum = np.full(len(cells), -np.inf)
+    minimum[nonempty] = values[starts[nonempty]]
+    maximum[nonempty] = values[ends[nonempty] - 1]
+
+    # Bucket size per cell and the number of buckets (the last one may be smaller)
+    bucket = np.maximum(-(-count // points_per_cell), 1)
+    n_points = -(-count // bucket)
+    point_cell = np.repeat(np.arange(len(cells)), n_points)
+    first_point = np.concatenate([[0], np.cumsum(n_points)[:-1]])
+    rank_in_cell = np.arange(len(point_cell)) - first_point[point_cell]
+    bucket_start = starts[point_cell] + rank_in_cell * bucket[point_cell]
+    bucket_size = np.minimum(bucket[point_cell], ends[point_cell] - bucket_start)
+    return _MeasureSummary(
+        cells, count, mean, m2, minimum, maximum, zeros, bucket // 2,
+        point_cell, values[bucket_start + bucket_size // 2], bucket_size.astype(np.int64)
+    )
+
+
+class QuantileSketches:
+    """Per-cell summaries of the measurement columns of one dataset, with the GroupedStatsEngine interface."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        dimensions: List[str],
+        measures: List[str],
+        points_per_cell: int = DEFAULT_POINTS_PER_CELL,
+        max_entries: int = 64,
+    ):
+        self.dimensions = [col for col in dimensions if col in df.columns]
+        self.measures = [col for col in measures if col in df.columns]
+        self.points_per_cell = points_per_cell
+        self._labels: Dict[str, pd.Index] = {}
+        axis_codes = []
+        for col in self.dimensions:
+            codes, labels = encode_categories(df[col])
+            # Missing values go to a trailing slot, as in CountCube
+            axis_codes.append(np.where(codes < 0, len(labels), codes))
+            self._labels[col] = labels
+        self._shape = tuple(len(self._labels[col]) + 1 for col in self.dimensions)
+        if self.dimensions:
+            cell_ids = np.ravel_multi_index(axis_codes, self._shape)
+        else:
+            cell_ids = np.zeros(len(df), dtype=np.int64)
+        self._summaries = {
+            col: summarize_cells(cell_ids, numeric_values(df[col]), points_per_cell) for col in self.measures
+        }
+        self._cache: "OrderedDict[Hashable, GroupedStats]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the summaries (the memoized results are small and not counted)."""
+        return sum(summary.nbytes for summary in self._summaries.values())
+
+    def _slots(self, cells: np.ndarray, column: str) -> np.ndarray:
+        """Return the slot of ``column`` for every cell, -1 where the value is missing."""
+        slots = np.unravel_index(cells, self._shape)[self.dimensions.index(column)]
+        return np.where(slots == len(self._labels[column]), -1, slots)
+
+    def _selected(self, cells: np.ndarray, selections: Optional[Dict[str, Iterable]]) -> np.ndarray:
+        """Return which cells match ``selections`` (None selects nothing; same semantics as FilterIndex)."""
+        if selections is None:
+            return np.zeros(len(cells), dtype=bool)
+        selected = np.ones(len(cells), dtype=bool)
+        for col, values in selections.items():
+            if not values or col not in self._labels:
+                continue
+            allowed = self._labels[col].get_indexer(list(values))
+            selected &= np.isin(self._slots(cells, col), allowed[allowed >= 0])
+        return selected
+
+    def get(
+        self,
+        filter_key: Hashable,
+        positions: Optional[np.ndarray],
+        group_col: str,
+        value_col: str,
+        drop_zeros: bool = False,
+    ) -> GroupedStats:
+        """Return approximate statistics of ``value_col`` by ``group_col``, like GroupedStatsEngine.get.
+
+        The rows are selected by ``filter_key`` (a filter signature, or anything else to
+        select nothing); ``positions`` is accepted for compatibility and ignored. Both
+        columns must be among the ``dimensions`` and ``measures`` the sketches were built for.
+        """
+        key = (filter_key, value_col, drop_zeros, group_col)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        selections = dict(filter_key) if isinstance(filter_key, tuple) else None
+        result = self._merge(self._summaries[value_col], selections, group_col, value_col, drop_zeros)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def _merge(self, summary: _MeasureSummary, selections: Optional[Dict], group_col: str, value_col: str, drop_zeros: bool) -> GroupedStats:
+        labels = self._labels[group_col]
+        n_groups = len(labels)
+        groups = self._slots(summary.cells, group_col)
+        keep = self._selected(summary.cells, selections) & (groups >= 0)
+        # Cells that are not kept are counted in an extra group that is dropped at the end
+        groups = np.where(keep, groups, n_groups)
+
+        # Exact moments: zeros are merged into their cell first, then cells into groups (Chan et al.)
+        zeros = np.zeros_like(summary.zeros) if drop_zeros else summary.zeros
+        count = summary.count + zeros
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cell_mean = np.where(count > 0, summary.count * summary.mean / count, 0.0)
+            cell_m2 = summary.m2 + np.where(count > 0, summary.mean ** 2 * summary.count * zeros / count, 0.0)
+            group_count = np.bincount(groups, weights=count, minlength=n_groups + 1)
+            group_mean = np.bincount(groups, weights=count * cell_mean, minlength=n_groups + 1) / group_count
+            group_m2 = np.bincount(groups, weights=cell_m2 + count * (cell_mean - group_mean[groups]) ** 2, minlength=n_groups + 1)
+            group_std = np.where(group_count > 1, np.sqrt(group_m2 / (group_count - 1)), np.nan)
+        cell_min = np.where(zeros > 0, np.minimum(summary.minimum, 0.0), summary.minimum)
+        cell_max = np.where(zeros > 0, np.maximum(summary.maximum, 0.0), summary.maximum)
+        group_min = np.full(n_groups + 1, np.inf)
+        group_max = np.full(n_groups + 1, -np.inf)
+        np.minimum.at(group_min, groups, cell_min)
+        np.maximum.at(group_max, groups, cell_max)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rank_error = np.bincount(groups, weights=summary.half_bucket, minlength=n_groups + 1) / group_count
+
+        # Quartiles from the summary points of the kept cells, plus one exact point per cell for its zeros
+        point_keep = keep[summary.point_cell]
+        zero_cells = np.flatnonzero(keep & (zeros > 0))
+        stats, outliers = summarize_weighted_groups(
+            np.concatenate([groups[summary.point_cell[point_keep]], groups[zero_cells]]),
+            np.concatenate([summary.points[point_keep], np.zeros(len(zero_cells))]),
+            np.concatenate([summary.weights[point_keep], zeros[zero_cells]]),
+            labels,
+            group_col
+        )
+        present = labels.get_indexer(stats.index)
+        stats["mean"] = group_mean[present]
+        stats["std"] = group_std[present]
+        stats["min"] = group_min[present]
+        stats["max"] = group_max[present]
+        # The exact extremes are the whisker ends whenever they lie within the whisker range
+        iqr = stats["75%"] - stats["25%"]
+        stats["lowerfence"] = stats["lowerfence"].where(stats["min"] < stats["25%"] - WHISKER_IQR * iqr, stats["min"])
+        stats["upperfence"] = stats["upperfence"].where(stats["max"] > stats["75%"] + WHISKER_IQR * iqr, stats["max"])
+        stats["rank_error"] = rank_error[present]
+        return GroupedStats(stats, outliers.rename(columns={"value": value_col}))
@@ -0,0 +1,125 @@
+"""Compact column types for the cleaned inquiry DataFrame.
+
+Category columns become pandas Categoricals (ordered by the known vocabulary,
+with unknown values appended), the order status becomes a nullable boolean and
+the measurement columns are stored as float32.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from ingest_cache import frame_nbytes
+
+# Spellings accepted for the order status column (compared after str().strip().lower())
+BOOLEAN_TRUE_VALUES = {"true", "1", "1.0", "yes", "y", "○", "〇", "有", "あり", "受注"}
+BOOLEAN_FALSE_VALUES = {"false", "0", "0.0", "no", "n", "×", "x", "無", "なし", "失注"}
+
+
+def coerce_numeric_columns(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """Convert the given columns to numbers in place; non-numeric values and blanks become NaN."""
+    # Data Cleaning: Convert non-numeric, empty strings, or whitespace to NaN for specific columns
+    for col in columns:
+        if col in df.columns:
+            # Convert all non-numeric values (including blank strings) to NaN
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Also replace any remaining whitespace-only strings with NaN
+            df[col] = df[col].replace(r'^s*$', pd.NA, regex=True)
+    return df
+
+
+def header_token(name) -> str:
+    """Normalize a header for matching: trimmed, single-spaced and case-folded."""
+    return " ".join(str(name).split()).casefold()
+
+
+def header_lookup(canonical_columns: Iterable[str], aliases: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Return {header token: canonical column} for the canonical names and their aliases."""
+    lookup = {header_token(col): col for col in canonical_columns}
+    for alias, col in (aliases or {}).items():
+        lookup.setdefault(header_token(alias), col)
+    return lookup
+
+
+def canonicalize_columns(df: pd.DataFrame, canonical_columns: Iterable[str], aliases: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Rename headers that differ from a canonical column name only by spacing/case, or that are listed in ``aliases``.
+       Other columns are kept as they are; if two headers map to the same name, the first one wins."""
+    lookup = header_lookup(canonical_columns, aliases)
+    renames = {}
+    taken = set()
+    for col in df.columns:
+        target = lookup.get(header_token(col), col)
+        if target in taken:
+            target = col
+        renames[col] = target
+        taken.add(target)
+    return df.rename(columns=renames)
+
+
+def to_categorical(series: pd.Series, vocabulary: Iterable[str]) -> pd.Series:
+    """Convert a column to a Categorical.
+       Values found in the vocabulary keep its order; values outside it are appended in sorted order."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Already encoded (e.g. by the streaming reader): only reorder the categories that are used
+        series = series.cat.remove_unused_categories()
+        present = list(series.cat.categories)
+    else:
+        present = pd.unique(series.dropna())
+    present_set = set(present)
+    known = [v for v in dict.fromkeys(vocabulary) if v in present_set]
+    known_set = set(known)
+    extra = sorted((v for v in present if v not in known_set), key=str)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.reorder_categories(known + extra)
+    return series.astype(pd.CategoricalDtype(categories=known + extra))
+
+
+def to_nullable_boolean(series: pd.Series) -> Optional[pd.Series]:
+    """Convert a column to the nullable "boolean" dtype.
+       Returns None if any non-missing value cannot be interpreted as True/False."""
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype("boolean")
+    uniques = pd.unique(series.dropna())
+    mapping = {}
+    for value in uniques:
+        token = str(value).strip().lower()
+        if token in BOOLEAN_TRUE_VALUES:
+            mapping[value] = True
+        elif token in BOOLEAN_FALSE_VALUES:
+            mapping[value] = False
+        else:
+            return None
+    # Map once per distinct value rather than once per row
+    return series.map(mapping).astype("boolean")
+
+
+def normalize_schema(
+    df: pd.DataFrame,
+    category_vocabularies: Dict[str, List[str]],
+    boolean_columns: List[str],
+    float32_columns: List[str],
+) -> pd.DataFrame:
+    """Return a copy of ``df`` with the known columns converted to compact dtypes.
+       Columns that are missing are skipped; a boolean column that cannot be converted is left unchanged."""
+    df = df.copy(deep=False)
+    for col, vocabulary in category_vocabularies.items():
+        if col in df.columns:
+            df[col] = to_categorical(df[col], vocabulary)
+    for col in boolean_columns:
+        if col in df.columns:
+            converted = to_nullable_boolean(df[col])
+            if converted is not None:
+                df[col] = converted
+    for col in float32_columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col].dtype):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> Dict[str, int]:
+    """Return the deep memory footprint of a frame before and after normalization."""
+    return {"before_bytes": frame_nbytes(before), "after_bytes": frame_nbytes(after)}
@@ -0,0 +1,112 @@
+"""Fast cold start: heavy modules are imported on first use, then warmed up once per process.
+
+numpy, pandas, pyarrow and plotly take most of a cold process's start-up
+time, before the app has drawn anything. The modules of this app therefore
+bind them through ``lazy_import``:
+
+    pd = lazy_import("pandas")
+
+``pd`` stands in for the module and imports it on its first attribute access
+(annotations are not evaluated, see ``from __future__ import annotations``), so
+importing ``app`` does not import pandas and the page with the upload prompt is
+drawn right away. Each attribute is copied onto the stand-in when first read, so
+later accesses cost a normal attribute lookup.
+
+Once the prompt is visible, ``warm_up`` imports the modules in a background
+thread and builds a bar chart and a boxplot once, which loads plotly's default
+template and its lazily imported figure classes. The first real chart then
+does not pay for them while the user is waiting for it.
+"""
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Dict, List, Optional
+
+# Imported by warm_up, in this order
+HEAVY_MODULES = ["numpy", "pandas", "pyarrow", "plotly.graph_objects", "plotly.express", "plotly.io"]
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access (thread-safe)."""
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            # importlib serializes concurrent imports of the same module
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a stand-in for the module ``name`` that imports it on first use."""
+    return LazyModule(name)
+
+
+def prebuild_figure_templates() -> None:
+    """Build one bar chart and one boxplot so the default template and the figure classes are loaded."""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    template = pio.templates.default
+    if isinstance(template, str):
+        # Parse the named template once; figures then copy the parsed object
+        pio.templates[template]
+    px.bar(pd.DataFrame({"x": ["a"], "y": [1]}), x="x", y="y", color_discrete_sequence=px.colors.qualitative.Pastel)
+    go.Figure(go.Box(x=["a"], q1=[0.0], median=[1.0], q3=[2.0], lowerfence=[0.0], upperfence=[2.0])).to_plotly_json()
+
+
+# Per-process state of warm_up; Streamlit re-executes the app script, but imported modules persist
+_warm_up: Dict = {"thread": None, "seconds": None}
+_warm_up_lock = threading.Lock()
+
+
+def _run_warm_up(modules: List[str]) -> None:
+    start = time.perf_counter()
+    try:
+        for name in modules:
+            importlib.import_module(name)
+        prebuild_figure_templates()
+    except ImportError:
+        # Optional modules may be missing; whatever is needed is imported on first use anyway
+        pass
+    _warm_up["seconds"] = time.perf_counter() - start
+
+
+def warm_up(modules: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+    """Import the heavy modules and prebuild the figure templates, once per process.
+       Returns the background thread (None when run in the calling thread or already started)."""
+    with _warm_up_lock:
+        if _warm_up["thread"] is not None:
+            return None
+        thread = threading.Thread(target=_run_warm_up, args=(modules or HEAVY_MODULES,), name="warm-up", daemon=True)
+        _warm_up["thread"] = thread
+    if not background:
+        thread.run()
+        return None
+    thread.start()
+    return thread
+
+
+def warm_up_seconds() -> Optional[float]:
+    """Duration of the warm-up, or None while it has not finished."""
+    return _warm_up["seconds"]
@@ -0,0 +1,126 @@
+"""Paginated, column-projected view of the filtered rows.
+
+Instead of sending the whole filtered frame to the browser on every rerun, the
+table shows one page: the selected rows are ordered on the server, the page is
+sliced out of the order, only the chosen columns are kept and that small frame
+is converted to Arrow for the browser.
+
+Sorting is the expensive part, so the order is memoized per filter state,
+column and direction; moving between pages only slices the cached order.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+
+PAGE_SIZES = [25, 50, 100, 500, 1000]
+
+
+def sort_keys(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (keys, missing) arrays that order a column on the server.
+       Categoricals sort by category order (the known vocabulary first), text alphabetically."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        keys = series.cat.codes.to_numpy().astype(np.int64)
+        return keys, keys < 0
+    if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        keys = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return keys, np.isnan(keys)
+    codes, _ = pd.factorize(series.astype(str).where(series.notna()), sort=True, use_na_sentinel=True)
+    keys = codes.astype(np.int64)
+    return keys, keys < 0
+
+
+class TableView:
+    """Sorted, paginated access to the rows of one dataset."""
+
+    def __init__(self, df: pd.DataFrame, max_orders: int = 16):
+        self._df = df
+        # Sort keys are extracted lazily, once per column
+        self._keys: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._orders: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._max_orders = max_orders
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the sort keys and the memoized orders."""
+        keys = sum(keys.nbytes + missing.nbytes for keys, missing in self._keys.values())
+        with self._lock:
+            orders = sum(order.nbytes for order in self._orders.values())
+        return keys + orders
+
+    def _sort_keys(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        if column not in self._keys:
+            self._keys[column] = sort_keys(self._df[column])
+        return self._keys[column]
+
+    def order(
+        self,
+        filter_key: Hashable,
+        positions: Optional[np.ndarray],
+        sort_col: Optional[str] = None,
+        ascending: bool = True,
+    ) -> np.ndarray:
+        """Return the positions of the selected rows in display order.
+
+        ``filter_key`` must identify ``positions`` (None means all rows). Without
+        ``sort_col`` the rows keep their order in the dataset; missing values sort last.
+        """
+        if positions is None:
+            positions = np.arange(len(self._df))
+        if sort_col is None or sort_col not in self._df.columns:
+            return positions
+        key = (filter_key, sort_col, ascending)
+        with self._lock:
+            cached = self._orders.get(key)
+            if cached is not None:
+                self._orders.move_to_end(key)
+                return cached
+
+        keys, missing = self._sort_keys(sort_col)
+        keys = keys[positions]
+        # lexsort is stable and sorts by its last key first: missing values last, then by value
+        ordered = positions[np.lexsort((keys if ascending else -keys, missing[positions]))]
+        ordered.flags.writeable = False
+
+        with self._lock:
+            self._orders[key] = ordered
+            while len(self._orders) > self._max_orders:
+                self._orders.popitem(last=False)
+        return ordered
+
+    def page(self, ordered: np.ndarray, page: int, page_size: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return rows ``page`` (1-based) of ``ordered``, restricted to ``columns``."""
+        start = (max(page, 1) - 1) * page_size
+        rows = self._df.iloc[ordered[start:start + page_size]]
+        if columns is not None:
+            rows = rows[[col for col in columns if col in rows.columns]]
+        return rows
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    """Number of pages needed for n_rows (at least one, so an empty selection still has a page)."""
+    return max((n_rows + page_size - 1) // page_size, 1)
+
+
+def objects_as_text(frame: pd.DataFrame) -> pd.DataFrame:
+    """Return ``frame`` with its object columns as text (missing values kept).
+       Arrow cannot convert an object column mixing numbers and strings, e.g. a free-text memo column."""
+    converted = frame.copy(deep=False)
+    for col in frame.columns:
+        series = frame[col]
+        if pd.api.types.is_object_dtype(series.dtype):
+            converted[col] = series.astype(str).where(series.notna(), None)
+    return converted
+
+
+def to_arrow(page: pd.DataFrame) -> pa.Table:
+    """Convert a page for display; the original row labels are dropped."""
+    return pa.Table.from_pandas(objects_as_text(page), preserve_index=False)
@@ -0,0 +1,85 @@
+"""Exports of a frame with a free-text column mixing numbers and strings, and the download buttons of the page.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import io
+
+import logging
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import streamlit as st
+from openpyxl import load_workbook
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import app
+import ingest_cache
+from benchmarks.synthetic import generate_inquiries, write_workbook
+from export import EXPORT_FORMATS, export_chunks, frame_chunks
+
+
+def memo_frame() -> pd.DataFrame:
+    # The first chunk of two rows holds no memo at all, the later ones mix numbers and strings
+    return pd.DataFrame({
+        "Memo": pd.Series([None, None, 3, "see photo", 4.5, None, "後日連絡"], dtype=object),
+        "Sludge Concentration (TS) %": [1.0, 2.5, None, 3.0, 4.0, 5.5, 6.0],
+    })
+
+
+def expected_memo() -> list:
+    return [None, None, "3", "see photo", "4.5", None, "後日連絡"]
+
+
+def test_parquet_keeps_one_schema_across_chunks():
+    df = memo_frame()
+    with export_chunks(frame_chunks(df, chunk_rows=2), "parquet") as out:
+        table = pq.read_table(io.BytesIO(out.read()))
+    assert table.num_rows == len(df)
+    assert table.column("Memo").to_pylist() == expected_memo()
+    assert table.column("Sludge Concentration (TS) %").to_pylist()[:2] == [1.0, 2.5]
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_every_format_exports_mixed_text(fmt):
+    df = memo_frame()
+    with export_chunks(frame_chunks(df, chunk_rows=2), fmt) as out:
+        data = out.read()
+    if fmt == "parquet":
+        memo = pq.read_table(io.BytesIO(data)).column("Memo").to_pylist()
+    elif fmt == "csv":
+        memo = pd.read_csv(io.BytesIO(data), encoding="utf-8-sig", dtype=str, keep_default_na=False)["Memo"].tolist()
+        memo = [value or None for value in memo]
+    else:
+        sheet = load_workbook(io.BytesIO(data), read_only=True).active
+        memo = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
+        # Excel keeps numbers as numbers
+        memo = [None if value is None else str(value) for value in memo]
+    assert memo == expected_memo()
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_download_buttons_return_data_streamlit_accepts(fmt, tmp_path, monkeypatch):
+    path = tmp_path / "inquiries.xlsx"
+    write_workbook(generate_inquiries(500, seed=0), str(path))
+    # app.main() runs outside of a Streamlit server; its "missing ScriptRunContext" warnings are noise here
+    logging.disable(logging.WARNING)
+    monkeypatch.setattr(ingest_cache, "_default_cache", ingest_cache.IngestionCache(cache_dir=None))
+    monkeypatch.setattr(app, "WARM_UP", False)
+    monkeypatch.setattr(st, "file_uploader", lambda *args, **kwargs: [str(path)])
+    monkeypatch.setattr(st.sidebar, "selectbox", lambda label, options, **kwargs: fmt if kwargs.get("key") == "export_format" else options[0])
+    monkeypatch.setattr(st, "plotly_chart", lambda *args, **kwargs: None)
+    downloads = {}
+    monkeypatch.setattr(st, "download_button", lambda label, data, **kwargs: downloads.setdefault(kwargs["key"], data))
+    try:
+        app.main()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert "download_data" in downloads
+    for key, data in downloads.items():
+        # What Streamlit does with the result of a deferred download when the button is clicked
+        payload, _ = convert_data_to_bytes_and_infer_mime(data(), unsupported_error=TypeError(key))
+        assert payload
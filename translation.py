@@ -0,0 +1,111 @@
+"""JP/EN translation of column headers and category values.
+
+The dataset itself is kept in one (canonical) form: when a workbook is cleaned,
+every known spelling of a category value, Japanese or English, is mapped to its
+English value (``canonicalize_series``), so files in both languages can be
+combined. Translation is applied at the edges, when labels are displayed. Category columns are pandas Categoricals,
+so translating a column only renames its categories: the cost is proportional
+to the number of distinct values, not to the number of rows, and switching the
+UI language never touches the parsed data.
+"""
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SUPPORTED_LANGUAGES = ["en", "ja"]
+
+
+class Translator:
+    """Translates category values and column labels between Japanese and English."""
+
+    def __init__(
+        self,
+        value_pairs: Dict[str, List[Tuple[str, str]]],
+        column_labels: Dict[str, Dict[str, str]],
+    ):
+        """``value_pairs`` maps a column to its (ja, en) value pairs; several English spellings
+           may share one Japanese value. ``column_labels`` maps a language to {column: label}."""
+        self.column_labels = column_labels
+        self._mappings: Dict[str, Dict[str, Dict[Hashable, Hashable]]] = {"en": {}, "ja": {}}
+        # Any spelling -> the English value the data is stored with
+        self._canonical: Dict[str, Dict[Hashable, Hashable]] = {}
+        for column, pairs in value_pairs.items():
+            to_en = self._mappings["en"].setdefault(column, {})
+            to_ja = self._mappings["ja"].setdefault(column, {})
+            for ja, en in pairs:
+                # The first English spelling listed for a Japanese value is the one shown
+                to_en.setdefault(ja, en)
+                to_ja.setdefault(en, ja)
+            canonical = self._canonical.setdefault(column, {})
+            for ja, en in pairs:
+                canonical[ja] = to_en[ja]
+                canonical[en] = to_en[ja]
+
+    def value(self, column: str, value, lang: str):
+        """Translate a single value (values without a translation are returned unchanged)."""
+        return self._mappings.get(lang, {}).get(column, {}).get(value, value)
+
+    def values(self, column: str, values: Iterable, lang: str) -> List:
+        """Translate a list of values."""
+        mapping = self._mappings.get(lang, {}).get(column, {})
+        return [mapping.get(value, value) for value in values]
+
+    def column(self, column: str, lang: str) -> str:
+        """Return the display label of a column."""
+        return self.column_labels.get(lang, {}).get(column, column)
+
+    def translate_series(self, series: pd.Series, lang: str, column: Optional[str] = None) -> pd.Series:
+        """Translate the values of a column.
+           Categoricals are translated by renaming their categories, i.e. once per distinct value."""
+        column = column if column is not None else series.name
+        return self._map_series(series, self._mappings.get(lang, {}).get(column))
+
+    def canonicalize_series(self, series: pd.Series, column: Optional[str] = None) -> pd.Series:
+        """Map every known spelling of the values of a column to the canonical (English) value,
+           merging categories that become equal. Unknown values are kept."""
+        column = column if column is not None else series.name
+        return self._map_series(series, self._canonical.get(column))
+
+    def _map_series(self, series: pd.Series, mapping: Optional[Dict]) -> pd.Series:
+        if not mapping:
+            return series
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            # Not dictionary-encoded: still map once per distinct value
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            return pd.Series(self._recode(codes, list(uniques), mapping), index=series.index, name=series.name)
+        categories = list(series.cat.categories)
+        translated = [mapping.get(c, c) for c in categories]
+        if len(set(translated)) == len(translated):
+            return series.cat.rename_categories(translated)
+        # Two spellings translate to the same label (e.g. the data mixes ja and en values): merge them
+        return pd.Series(self._recode(series.cat.codes.to_numpy(), categories, mapping), index=series.index, name=series.name)
+
+    @staticmethod
+    def _recode(codes: np.ndarray, categories: List, mapping: Dict) -> pd.Categorical:
+        translated = [mapping.get(c, c) for c in categories]
+        merged = list(dict.fromkeys(translated))
+        position = {label: i for i, label in enumerate(merged)}
+        remap = np.array([position[label] for label in translated] + [-1], dtype=np.int64)
+        # Code -1 (missing) indexes the trailing -1
+        return pd.Categorical.from_codes(remap[codes], categories=merged)
+
+    def translate_index(self, index: pd.Index, lang: str, column: Optional[str] = None) -> pd.Index:
+        """Translate the labels of a (small) index, e.g. the categories of a summary table."""
+        column = column if column is not None else index.name
+        mapping = self._mappings.get(lang, {}).get(column)
+        if not mapping:
+            return index
+        return pd.Index([mapping.get(v, v) for v in index], name=index.name)
+
+    def translate_frame(self, df: pd.DataFrame, lang: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Return a shallow copy of ``df`` with category values translated and headers relabelled."""
+        translated = df.copy(deep=False)
+        for col in (columns if columns is not None else df.columns):
+            if col in translated.columns:
+                translated[col] = self.translate_series(translated[col], lang, col)
+        return translated.rename(columns=lambda c: self.column(c, lang))